@@ -0,0 +1,280 @@
+"""
+activity_poller.py
+
+Processo contínuo que acompanha, quase em tempo real, os eventos públicos de
+uma lista de usuários do GitHub (por exemplo, os favoritados no app) e emite
+apenas os eventos novos.
+
+Cada usuário guarda o ETag da última resposta e o id do último evento visto:
+as consultas são condicionais (If-None-Match), e um 304 do GitHub não consome
+o limite de taxa. O intervalo entre consultas respeita o cabeçalho
+X-Poll-Interval, e uma fila de prioridade (heap) ordena os usuários pelo
+horário da próxima consulta.
+
+    python activity_poller.py --favorites --json >> eventos.jsonl
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import models
+from github_activity import activity_from_event, format_activity, read_usernames
+from github_client import GitHubError, GitHubRateLimitError, github_client
+from github_records import project
+from github_scheduler import background_priority
+
+# Eventos pedidos por consulta (máximo da API); quanto maior, menor a chance de perder eventos entre consultas
+EVENTS_PER_PAGE = 100
+# Intervalo mínimo entre consultas do mesmo usuário (o GitHub costuma pedir 60 s)
+DEFAULT_MIN_INTERVAL = 60
+# Espera máxima após falhas seguidas de um usuário
+MAX_ERROR_DELAY = 900
+
+
+def _event_id(event):
+    try:
+        return int(event.id)
+    except (TypeError, ValueError):
+        return 0
+
+
+class _WatchState:
+    __slots__ = ("username", "etag", "last_event_id", "interval", "failures", "next_poll_at")
+
+    def __init__(self, username, interval):
+        self.username = username
+        self.etag = None
+        self.last_event_id = None
+        self.interval = interval
+        self.failures = 0
+        self.next_poll_at = 0.0
+
+
+class ActivityPoller:
+    """
+    Agenda consultas condicionais aos eventos de cada usuário acompanhado.
+
+    Parâmetros:
+        on_event (callable): Chamado com cada atividade nova (ver github_activity.activity_from_event),
+            da mais antiga para a mais recente de cada usuário.
+        client (GitHubClient): Cliente usado nas consultas.
+        min_interval (float): Intervalo mínimo, em segundos, entre consultas do mesmo usuário.
+        max_workers (int): Consultas simultâneas.
+        emit_initial (bool): Se True, a primeira consulta de cada usuário também emite os eventos
+            já existentes; por padrão ela só marca o ponto de partida.
+    """
+
+    def __init__(self, on_event=None, client=github_client, min_interval=DEFAULT_MIN_INTERVAL,
+                 max_workers=4, emit_initial=False):
+        self.on_event = on_event or (lambda activity: print(format_activity(activity), flush=True))
+        self.client = client
+        self.min_interval = min_interval
+        self.max_workers = max_workers
+        self.emit_initial = emit_initial
+        self._states = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._stopped = False
+        self.polls = 0
+        self.not_modified = 0
+        self.new_events = 0
+        self.errors = 0
+
+    def add_user(self, username, delay=0):
+        """Passa a acompanhar o usuário (a primeira consulta ocorre após `delay` segundos)."""
+        with self._cond:
+            if username in self._states:
+                return
+            state = _WatchState(username, self.min_interval)
+            self._states[username] = state
+            self._schedule(state, delay)
+
+    def remove_user(self, username):
+        """Deixa de acompanhar o usuário (a entrada no heap é descartada quando chegar a vez dela)."""
+        with self._cond:
+            self._states.pop(username, None)
+
+    def users(self):
+        with self._cond:
+            return list(self._states)
+
+    def _schedule(self, state, delay):
+        state.next_poll_at = time.time() + delay
+        heapq.heappush(self._heap, (state.next_poll_at, next(self._seq), state.username))
+        self._cond.notify_all()
+
+    def poll(self, state):
+        """
+        Consulta os eventos do usuário uma vez e emite os novos.
+
+        Retorno:
+            float: Segundos até a próxima consulta, ou None se o usuário deve deixar de ser acompanhado.
+        """
+        scheduler = self.client.scheduler
+        with background_priority():
+            if state.etag is None and scheduler.budget_low():
+                # Saldo reservado às páginas do app: espera o limite ser renovado. Consultas
+                # com ETag seguem, pois um 304 não conta no limite de taxa.
+                return max(state.interval, scheduler.seconds_until_reset())
+            headers = {"If-None-Match": state.etag} if state.etag else None
+            try:
+                resp = self.client.fetch(f"/users/{state.username}/events?per_page={EVENTS_PER_PAGE}", headers)
+            except GitHubRateLimitError as e:
+                return max(state.interval, e.retry_in)
+            except GitHubError:
+                return self._failed(state)
+
+        with self._cond:
+            self.polls += 1
+        try:
+            poll_interval = int(resp.headers.get("X-Poll-Interval") or 0)
+        except ValueError:
+            poll_interval = 0
+        state.interval = max(self.min_interval, poll_interval)
+
+        if resp.status == 304:
+            state.failures = 0
+            with self._cond:
+                self.not_modified += 1
+            return state.interval
+        if resp.status == 404:
+            print(f"{state.username}: usuário não encontrado; deixando de acompanhar.", file=sys.stderr)
+            return None
+        if resp.status != 200:
+            return self._failed(state)
+
+        try:
+            events = project(resp.url, resp.json()) or []
+        except GitHubError:
+            return self._failed(state)
+        state.failures = 0
+        state.etag = resp.headers.get("ETag")
+        first_poll = state.last_event_id is None
+        last_seen = state.last_event_id or 0
+        new = sorted((event for event in events if _event_id(event) > last_seen), key=_event_id)
+        if new:
+            state.last_event_id = _event_id(new[-1])
+        elif first_poll:
+            state.last_event_id = 0
+        if first_poll and not self.emit_initial:
+            return state.interval
+
+        with self._cond:
+            self.new_events += len(new)
+        for event in new:
+            self.on_event(activity_from_event(event, state.username))
+        return state.interval
+
+    def _failed(self, state):
+        """Backoff exponencial para falhas seguidas do mesmo usuário."""
+        state.failures += 1
+        with self._cond:
+            self.errors += 1
+        return min(MAX_ERROR_DELAY, state.interval * (2 ** state.failures))
+
+    def _poll_and_reschedule(self, state):
+        try:
+            delay = self.poll(state)
+        except Exception as e:
+            print(f"{state.username}: {e}", file=sys.stderr)
+            delay = self._failed(state)
+        with self._cond:
+            self._in_flight -= 1
+            if delay is None:
+                if self._states.get(state.username) is state:
+                    del self._states[state.username]
+            elif self._states.get(state.username) is state:
+                self._schedule(state, delay)
+            self._cond.notify_all()
+
+    def run(self):
+        """Laço principal: dispara as consultas vencidas, no máximo `max_workers` de cada vez, até stop()."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            with self._cond:
+                while not self._stopped:
+                    if self._in_flight >= self.max_workers or not self._heap:
+                        self._cond.wait()
+                        continue
+                    due, _, username = self._heap[0]
+                    wait = due - time.time()
+                    if wait > 0:
+                        self._cond.wait(wait)
+                        continue
+                    heapq.heappop(self._heap)
+                    state = self._states.get(username)
+                    if state is None or state.next_poll_at != due:
+                        continue  # usuário removido ou reagendado
+                    self._in_flight += 1
+                    pool.submit(self._poll_and_reschedule, state)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def stats(self):
+        """
+        Contadores das consultas e estimativa de consultas por hora com os intervalos
+        atuais (para dimensionar a lista acompanhada frente ao limite de taxa).
+        """
+        with self._cond:
+            return {
+                "users": len(self._states),
+                "polls": self.polls,
+                "not_modified": self.not_modified,
+                "new_events": self.new_events,
+                "errors": self.errors,
+                "polls_per_hour": round(sum(3600 / state.interval for state in self._states.values())),
+            }
+
+
+def _print_json(activity):
+    print(json.dumps(activity, ensure_ascii=False, separators=(",", ":")), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Acompanha os eventos públicos de usuários do GitHub.")
+    parser.add_argument("usernames", nargs="*", help="Usuários do GitHub a acompanhar")
+    parser.add_argument("-f", "--file", help="Arquivo com um usuário por linha ('-' para stdin)")
+    parser.add_argument("--favorites", action="store_true", help="Acompanha os usuários favoritados no app")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON lines")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Consultas simultâneas (padrão: 4)")
+    parser.add_argument("--min-interval", type=float, default=DEFAULT_MIN_INTERVAL,
+                        help=f"Intervalo mínimo entre consultas do mesmo usuário, em segundos (padrão: {DEFAULT_MIN_INTERVAL})")
+    parser.add_argument("--emit-initial", action="store_true", help="Emite também os eventos já existentes")
+    args = parser.parse_args(argv)
+
+    usernames = list(args.usernames)
+    if args.file:
+        usernames.extend(read_usernames(args.file))
+    if args.favorites:
+        usernames.extend(models.list_favorited_github_usernames())
+    usernames = list(dict.fromkeys(usernames))
+    if not usernames:
+        parser.error("informe ao menos um usuário, -f ou --favorites")
+
+    on_event = _print_json if args.json else None
+    poller = ActivityPoller(on_event=on_event, min_interval=args.min_interval, max_workers=max(1, args.workers),
+                            emit_initial=args.emit_initial)
+    # Espalha as primeiras consultas pelo intervalo, em vez de todas de uma vez
+    step = args.min_interval / len(usernames)
+    for i, username in enumerate(usernames):
+        poller.add_user(username, delay=i * step)
+    try:
+        poller.run()
+    except KeyboardInterrupt:
+        poller.stop()
+    print(json.dumps(poller.stats()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
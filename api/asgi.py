@@ -0,0 +1,272 @@
+"""
+api/asgi.py
+
+Modo de execução assíncrono (ASGI) do app, ao lado do objeto WSGI "app" de
+api/index.py:
+
+    pip install uvicorn
+    uvicorn api.asgi:app --host 0.0.0.0 --port 8000
+
+As rotas continuam sendo as do Flask (mesmas views, templates e models.py).
+Antes de repassar uma requisição ao Flask, o adaptador identifica a rota pelo
+próprio url_map do app e busca no event loop, com o cliente assíncrono
+(github_async), os dados do GitHub que a view vai pedir: perfil,
+repositórios, commits a sincronizar, eventos... Como os dois clientes
+compartilham o cache, a view roda em seguida numa thread do pool e encontra
+tudo em cache. A espera pelo GitHub (até o timeout de 8 s) fica no event
+loop, que segura centenas de buscas lentas ao mesmo tempo, e cada thread só
+fica ocupada pelos milissegundos de SQLite e renderização. As leituras do
+SQLite feitas pelo pré-carregamento também rodam fora do event loop
+(asyncio.to_thread).
+
+O que o pré-carregamento não cobrir (ex.: páginas antigas de commits) é
+buscado normalmente pela view, como no modo WSGI. O que ele não conseguir
+buscar (erro de conexão, 404, 5xx...) não é buscado de novo: a view recebe
+a mesma falha (github_client.remember_failures) e a trata como no modo WSGI,
+sem repetir as tentativas e os timeouts.
+"""
+
+import asyncio
+import contextvars
+import io
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# api/ (para importar index) e a raiz do projeto (módulos compartilhados)
+_API_DIR = os.path.dirname(os.path.abspath(__file__))
+for _path in (os.path.dirname(_API_DIR), _API_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from werkzeug.exceptions import HTTPException  # noqa: E402
+from werkzeug.wrappers import Request  # noqa: E402
+
+import models  # noqa: E402
+from github import pending_sync_params, repo_commits_url, user_repos_url  # noqa: E402
+from github_activity import events_url  # noqa: E402
+from github_async import async_github_client  # noqa: E402
+from github_client import GitHubError, remember_failures  # noqa: E402
+from github_stats import recent_repos  # noqa: E402
+from index import app as flask_app  # noqa: E402
+
+# Threads que executam as views Flask (SQLite e renderização; a espera pelo GitHub fica no event loop)
+WSGI_WORKERS = int(os.environ.get("ASGI_WSGI_WORKERS", "32"))
+
+
+async def _settle(*aws):
+    """Espera todas as buscas; falhas ficam registradas para a view, que trata o erro."""
+    for result in await asyncio.gather(*aws, return_exceptions=True):
+        if isinstance(result, Exception) and not isinstance(result, (GitHubError, sqlite3.Error)):
+            print(f"asgi: falha no pré-carregamento: {result!r}", file=sys.stderr)
+
+
+async def _commits(owner, repo):
+    """Primeira busca que github.sync_repo_commits fará para o repositório."""
+    params = await asyncio.to_thread(pending_sync_params, owner, repo)
+    await async_github_client.get_pages(repo_commits_url(owner, repo, **params), params.get("max_items"))
+
+
+async def _profile(username, repo=None):
+    aws = [async_github_client.get_page(f"/users/{username}"), async_github_client.get_pages(user_repos_url(username))]
+    if repo:
+        aws.append(_commits(username, repo))
+    await _settle(*aws)
+
+
+async def _stats_repos(username):
+    repos = await async_github_client.get_pages(user_repos_url(username))
+    await _settle(*(_commits(username, repo.name) for repo in recent_repos(repos)))
+
+
+async def _warm_index(request, view_args):
+    values = request.form if request.method == "POST" else request.args
+    username = values.get("username", "").strip()
+    if username:
+        await _profile(username, values.get("repo", "").strip() or None)
+
+
+async def _warm_stats(request, view_args):
+    username = view_args["username"]
+    await _settle(async_github_client.get_page(f"/users/{username}"), _stats_repos(username))
+
+
+async def _warm_favoritos(request, view_args):
+    session = flask_app.session_interface.open_session(flask_app, request)
+    user_id = session.get("user_id") if session is not None else None
+    if user_id is None:
+        return
+    usernames = await asyncio.to_thread(models.list_github_favorites, user_id)
+    await _settle(*(async_github_client.get_page(f"/users/{username}") for username in usernames))
+
+
+async def _warm_api_user(request, view_args):
+    await _settle(async_github_client.get_page(f"/users/{view_args['username']}"))
+
+
+async def _warm_api_repos(request, view_args):
+    await _settle(async_github_client.get_pages(user_repos_url(view_args["username"])))
+
+
+async def _warm_api_commits(request, view_args):
+    await _settle(_commits(view_args["username"], view_args["repo"]))
+
+
+async def _warm_api_activity(request, view_args):
+    await _settle(async_github_client.get_page(events_url(view_args["username"])))
+
+
+# Pré-carregamento por endpoint do Flask: async (request, view_args) -> None
+WARMERS = {
+    "index": _warm_index,
+    "stats": _warm_stats,
+    "favoritos": _warm_favoritos,
+    "json_api.user": _warm_api_user,
+    "json_api.repos": _warm_api_repos,
+    "json_api.commits": _warm_api_commits,
+    "json_api.activity": _warm_api_activity,
+}
+
+
+def _environ(scope, body):
+    """Monta o environ WSGI (PEP 3333) de uma requisição HTTP ASGI."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[name] = value
+            continue
+        key = "HTTP_" + name
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # O corpo já foi lido por inteiro (inclusive se veio em chunked, sem Content-Length)
+    environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+class AsgiApp:
+    """
+    Aplicação ASGI que pré-carrega os dados do GitHub da rota no event loop
+    e executa o app WSGI num pool de threads.
+
+    Parâmetros:
+        wsgi_app: App Flask (usado também para identificar a rota e ler a sessão).
+        warmers (dict): Pré-carregamento por endpoint (padrão: WARMERS).
+        workers (int): Threads do pool que executam o app WSGI.
+    """
+
+    def __init__(self, wsgi_app, warmers=None, workers=WSGI_WORKERS):
+        self.wsgi_app = wsgi_app
+        self.warmers = WARMERS if warmers is None else warmers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asgi-wsgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            body = await self._read_body(receive)
+            with remember_failures():
+                await self._warm(scope, body)
+                await self._run_wsgi(_environ(scope, body), send)
+        else:
+            raise RuntimeError(f"Tipo de conexão ASGI não suportado: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                async_github_client.close()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        return b"".join(chunks)
+
+    async def _warm(self, scope, body):
+        """Identifica a rota pelo url_map do Flask e executa o pré-carregamento dela, se houver."""
+        request = Request(_environ(scope, body))
+        try:
+            endpoint, view_args = self.wsgi_app.url_map.bind_to_environ(request.environ).match()
+        except HTTPException:
+            return
+        warmer = self.warmers.get(endpoint)
+        if warmer is not None:
+            await warmer(request, view_args)
+
+    async def _run_wsgi(self, environ, send):
+        """
+        Executa o app WSGI numa thread do pool, do início ao fim do corpo. Cada pedaço
+        (páginas em streaming) é enviado assim que é gerado, pelo event loop. A
+        requisição inteira roda numa única tarefa do pool, no mesmo contexto, para
+        que as ContextVars da requisição (ex.: metrics) valham até o fim do corpo e
+        as requisições terminem na ordem em que chegaram ao pool.
+        """
+        loop = asyncio.get_running_loop()
+        response = {"sent": False}
+
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def write(data):
+            if not response["sent"]:
+                response["sent"] = True
+                send_sync({"type": "http.response.start", "status": response["status"], "headers": response["headers"]})
+            if data:
+                send_sync({"type": "http.response.body", "body": data, "more_body": True})
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response["sent"]:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers
+            ]
+            return write
+
+        def run():
+            iterable = self.wsgi_app(environ, start_response)
+            try:
+                for chunk in iterable:
+                    write(chunk)
+                write(b"")
+                send_sync({"type": "http.response.body", "body": b"", "more_body": False})
+            finally:
+                close = getattr(iterable, "close", None)
+                if close is not None:
+                    close()
+
+        await loop.run_in_executor(self.executor, contextvars.copy_context().run, run)
+
+app = AsgiApp(flask_app)
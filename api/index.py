@@ -1,217 +1,232 @@
 import os
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from flask import Flask, request, session, redirect, url_for, flash
+from flask import Flask, request, session, redirect, url_for, flash, get_flashed_messages, render_template, stream_template
 
 from auth import auth_bp
+from json_api import json_api_bp
+from github import iter_user_repos, get_repo_commits_page, index_user_repos
+from github_client import github_client, GitHubError, GitHubRateLimitError
+from github_stats import get_user_stats
+from prewarm import start_prewarm_worker
+import metrics
 import models  # models.py deve conter as funções usadas abaixo
 
-app = Flask(__name__)
+# Os templates e arquivos estáticos ficam na raiz do projeto, não em api/
+app = Flask(__name__, template_folder="../templates", static_folder="../static")
 
 # Configuração segura para a chave secreta (usar variável de ambiente, padrão inseguro só para dev)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "chave_insegura_padrao_para_desenvolvimento")
 
 app.register_blueprint(auth_bp, url_prefix="/auth")
+app.register_blueprint(json_api_bp, url_prefix="/api")
+
+# Compila os templates uma vez na carga do módulo; o Jinja mantém a versão compilada em cache
+for _template_name in ("index.html", "favoritos.html", "stats.html", "search.html"):
+    app.jinja_env.get_template(_template_name)
+
+# Quantidade de commits exibidos para o repositório selecionado
+COMMITS_SHOWN = 10
+
+# Resultados por página na busca
+SEARCH_PER_PAGE = 20
+
+# Máximo de perfis buscados ao mesmo tempo na página de favoritos
+FAVORITES_CONCURRENCY = int(os.environ.get("GITHUB_FAVORITES_CONCURRENCY", "8"))
+
+# Pool compartilhado para as chamadas à API do GitHub feitas pelas rotas (evita criar threads por requisição)
+_github_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("GITHUB_FETCH_WORKERS", "8")),
+    thread_name_prefix="github-fetch",
+)
+
+# Mantém os favoritos quentes em segundo plano. Desligado por padrão: em ambiente
+# serverless a thread não sobrevive entre requisições (lá, use prewarm.py pelo cron).
+if os.environ.get("GITHUB_PREWARM") == "1":
+    start_prewarm_worker()
+
+
+@app.before_request
+def _start_request_timing():
+    metrics.start_request()
+
+
+@app.after_request
+def _add_request_timing(response):
+    """
+    Adiciona o Server-Timing e mede a requisição inteira, até o fim do corpo, no
+    histograma por rota. Nas páginas em streaming (/ e /favoritos) os cabeçalhos saem
+    antes das buscas ao GitHub e da renderização, e o WSGI não permite enviar o valor
+    final como trailer HTTP: nelas o Server-Timing é omitido (um valor parcial seria
+    enganoso) e as etapas ficam só nos histogramas de /metrics.
+    """
+    timings = metrics.current_timings()
+    if timings is None:
+        return response
+    if not response.is_streamed:
+        response.headers["Server-Timing"] = timings.header()
+    route = request.url_rule.rule if request.url_rule else "(sem rota)"
+    method = request.method
+    response.call_on_close(lambda: metrics.HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - timings.started, route=route, method=method, status=response.status_code,
+    ))
+    return response
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Métricas no formato do Prometheus (protegidas por METRICS_TOKEN, se definido)."""
+    token = os.environ.get("METRICS_TOKEN")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return "Não autorizado.", 401
+    return app.response_class(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def _stream_page(template_name, **context):
+    """stream_template medido do início ao último pedaço enviado (template_render_duration_seconds)."""
+    return metrics.timed_stream(stream_template(template_name, **context), template_name)
+
+
+def _fetch_github_json(path):
+    """
+    Faz GET na API do GitHub pelo cliente compartilhado (conexões persistentes + cache).
+    Retorna os dados decodificados ou None em caso de erro.
+    GitHubRateLimitError é propagado para a página avisar sobre o limite de taxa.
+    """
+    try:
+        status, data = github_client.get_json(path)
+    except GitHubRateLimitError:
+        raise
+    except GitHubError:
+        return None
+    return data if status == 200 else None
 
 
 def get_github_user_info(username):
     """
     Recupera informações de usuário do GitHub sem dependências externas.
-    Retorna dict ou None.
+    Retorna User (github_records) ou None.
     """
-    import urllib.request
-    import json
-
     if not username:
         return None
 
-    url = f"https://api.github.com/users/{username}"
-    try:
-        with urllib.request.urlopen(url) as response:
-            if response.status != 200:
-                return None
-            return json.load(response)
-    except Exception:
-        return None
+    return _fetch_github_json(f"/users/{username}")
 
 
 def get_github_user_repos(username):
     """
-    Busca os repositórios públicos de um usuário do GitHub.
-    Retorna lista de dicts ou [].
+    Busca todos os repositórios públicos de um usuário do GitHub (todas as páginas).
+    Retorna lista de registros (github_records) ou [] (propaga GitHubRateLimitError).
     """
-    import urllib.request
-    import json
-
     if not username:
         return []
 
-    url = f"https://api.github.com/users/{username}/repos"
     try:
-        with urllib.request.urlopen(url) as response:
-            if response.status != 200:
-                return []
-            return json.load(response)
-    except Exception:
+        repos = list(iter_user_repos(username))
+    except GitHubRateLimitError:
+        raise
+    except GitHubError:
         return []
+    # Alimenta o índice da busca local (/search)
+    index_user_repos(username, repos)
+    return repos
 
 
-def get_github_repo_commits(username, repo_name):
+def get_github_repo_commits(username, repo_name, page=1, per_page=COMMITS_SHOWN):
     """
-    Busca commits de um repositório público do GitHub.
-    Retorna lista de dicts ou [].
+    Busca uma página de commits de um repositório público do GitHub.
+    Os commits são sincronizados de forma incremental com o banco local (só os novos
+    são baixados) e a página é servida a partir dele.
+    Retorna lista de registros (github_records) ou [] (propaga GitHubRateLimitError).
     """
-    import urllib.request
-    import json
-
     if not username or not repo_name:
         return []
+    return get_repo_commits_page(username, repo_name, page=page, per_page=per_page) or []
 
-    url = f"https://api.github.com/repos/{username}/{repo_name}/commits"
-    try:
-        with urllib.request.urlopen(url) as response:
-            if response.status != 200:
-                return []
-            return json.load(response)
-    except Exception:
-        return []
+
+def start_github_profile_fetch(username, repo_name=None, commits_page=1):
+    """
+    Dispara em paralelo as buscas de perfil, repositórios e commits do repositório selecionado.
+    Repositórios e commits são disparados especulativamente junto com o perfil.
+    Retorna os futures (perfil, repositórios, commits); use collect_github_profile para obter os dados.
+    """
+    info_future = _github_executor.submit(metrics.propagate(get_github_user_info), username)
+    repos_future = _github_executor.submit(metrics.propagate(get_github_user_repos), username)
+    commits_future = None
+    if repo_name:
+        commits_future = _github_executor.submit(
+            metrics.propagate(get_github_repo_commits), username, repo_name, commits_page
+        )
+    return info_future, repos_future, commits_future
+
+
+def collect_github_profile(futures):
+    """
+    Espera as buscas disparadas por start_github_profile_fetch.
+    Se o perfil não for encontrado, os resultados especulativos são descartados.
+    Retorna a tupla (user_info, repos, commits); levanta GitHubRateLimitError
+    se a cota da API estiver esgotada e não houver dados em cache.
+    """
+    info_future, repos_future, commits_future = futures
+    user_info = info_future.result()
+    if not user_info:
+        # Perfil inexistente: descarta as buscas especulativas (cancela as que ainda não começaram)
+        repos_future.cancel()
+        if commits_future:
+            commits_future.cancel()
+        return None, [], []
+
+    repos = repos_future.result()
+    commits = commits_future.result() if commits_future else []
+    return user_info, repos, commits
 
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    user_info = None
-    repos = []
-    commits = []
-    selected_repo = None
-    error = None
-    is_favorited = False
-
     if request.method == "POST":
         username = request.form.get("username", "").strip()
         repo_name = request.form.get("repo", "").strip()
     else:
         username = request.args.get("username", "").strip()
         repo_name = request.args.get("repo", "").strip() if "repo" in request.args else None
-
-    if username:
-        user_info = get_github_user_info(username)
-        if user_info:
-            repos = get_github_user_repos(username)
-            selected_repo = repo_name if repo_name else None
-            if selected_repo:
-                commits = get_github_repo_commits(username, selected_repo)
-        else:
-            error = "Usuário não encontrado!"
-    elif request.method == "POST":
-        error = "Por favor, informe um nome de usuário."
-
-    # Exibe botão de favorito apenas se o usuário está logado e consultou um perfil válido
-    if user_info and session.get("user_id"):
-        is_favorited = models.is_github_user_favorited(session["user_id"], user_info.get("login"))
-
-    # Em vez de render_template, renderize HTML diretamente (evita erro TemplateNotFound)
-    # Corrigido: usa chaves simples para format; todas as chaves do CSS foram trocadas por duplas
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8" />
-        <title>GitHub User Lookup</title>
-        <style>
-          body {{ font-family: Arial, sans-serif; padding: 2em; max-width: 700px; margin: auto; }}
-          .error {{ color: red; }}
-          .favorito {{ background: #f7f7aa; padding: .5em 1em; border-radius: 6px; }}
-        </style>
-    </head>
-    <body>
-        <h1>Consulta de Usuário GitHub</h1>
-        <form method="post">
-            <label for="username">Usuário GitHub:</label>
-            <input name="username" id="username" required value="{username}">
-            <button type="submit">Buscar</button>
-            <br><br>
-            {repos_select}
-        </form>
-        {error_html}
-        {user_info_html}
-        <hr>
-        <a href="{favoritos_url}">Meus Favoritos</a>
-    </body>
-    </html>
-    """
-
-    # Repositórios select
-    repos_select = ""
-    if user_info and repos:
-        repos_select += '<label for="repo">Selecionar repositório:</label>'
-        repos_select += '<select name="repo" id="repo" onchange="this.form.submit()">'
-        repos_select += '<option value="">--</option>'
-        for repo in repos:
-            selected = 'selected' if repo["name"] == (selected_repo or "") else ''
-            repos_select += f'<option value="{repo["name"]}" {selected}>{repo["name"]}</option>'
-        repos_select += '</select><br><br>'
-
-    # Erros
-    error_html = ""
-    if error:
-        error_html = f'<p class="error">{error}</p>'
-
-    # Favorito (para usuário logado)
-    favorito_btn = ""
-    if user_info and session.get("user_id"):
-        fav_form = f'''
-        <form style="display:inline" method="post" action="{url_for('favorite_github_user', github_username=user_info['login'])}">
-            <button type="submit" class="favorito">{'Remover dos favoritos' if is_favorited else 'Adicionar aos favoritos'}</button>
-        </form>
-        '''
-        favorito_btn = fav_form
-
-    # Exibir user_info
-    user_info_html = ""
-    if user_info:
-        user_info_html += "<h2>Perfil</h2>"
-        avatar = user_info.get("avatar_url", "")
-        if avatar:
-            user_info_html += f'<img src="{avatar}" alt="avatar" width="80"><br>'
-        user_info_html += f'<b>Login:</b> {user_info.get("login", "")}<br>'
-        user_info_html += f'<b>Nome:</b> {user_info.get("name","")}<br>' if user_info.get("name") else ""
-        user_info_html += f'<b>Bio:</b> {user_info.get("bio","")}<br>' if user_info.get("bio") else ""
-        user_info_html += f'<b>Repositórios públicos:</b> {user_info.get("public_repos","")}'
-        user_info_html += "<br>" + favorito_btn + "<br>"
-        # Exibir repositórios
-        if repos:
-            user_info_html += "<h3>Repositórios</h3>"
-            user_info_html += "<ul>"
-            for repo in repos:
-                repo_url = repo.get("html_url", "")
-                name = repo.get("name","")
-                li_selected = ' style="font-weight:bold;"' if selected_repo == name else ""
-                user_info_html += f'<li{li_selected}><a href="{repo_url}" target="_blank">{name}</a></li>'
-            user_info_html += "</ul>"
-        # Exibir commits do repo selecionado
-        if selected_repo and commits:
-            user_info_html += f"<h3>Commits do repositório: {selected_repo}</h3>"
-            user_info_html += "<ul>"
-            for commit in commits[:10]:
-                msg = commit.get("commit", {}).get("message", "")
-                sha = commit.get("sha", "")[:7]
-                author = commit.get("commit", {}).get("author",{}).get("name","")
-                user_info_html += f"<li><b>{sha}</b> {msg} <i>(por {author})</i></li>"
-            user_info_html += "</ul>"
-        elif selected_repo and not commits:
-            user_info_html += "<p>Nenhum commit encontrado ou não foi possível obter commits.</p>"
-
-    favoritos_url = url_for('favoritos')
-    # SafeDict protege chaves não usadas do format_map, para evitar KeyError ao renderizar html.format_map
-    class SafeDict(dict):
-        def __missing__(self, key):
-            return '{' + key + '}'
-    return html.format_map(SafeDict(
-        username=(username or ""),
-        repos_select=repos_select,
-        error_html=error_html,
-        user_info_html=user_info_html,
-        favoritos_url=favoritos_url
-    ))
+    selected_repo = repo_name if repo_name else None
+    commits_page = max(request.args.get("page", 1, type=int), 1)
+    user_id = session.get("user_id")
+
+    # Dispara as buscas já, antes de começar a enviar a página
+    futures = start_github_profile_fetch(username, selected_repo, commits_page) if username else None
+
+    def carregar_perfil():
+        """
+        Chamado pelo template depois que o cabeçalho da página já foi enviado.
+        Retorna (user_info, repos, commits, selected_repo, error, is_favorited).
+        """
+        if not futures:
+            error = "Por favor, informe um nome de usuário." if request.method == "POST" else None
+            return None, [], [], None, error, False
+        try:
+            user_info, repos, commits = collect_github_profile(futures)
+        except GitHubRateLimitError as e:
+            # Cota da API esgotada (e nada em cache): não é o mesmo que usuário inexistente
+            return None, [], [], None, str(e), False
+        if not user_info:
+            return None, [], [], None, "Usuário não encontrado!", False
+        # Exibe botão de favorito apenas se o usuário está logado e consultou um perfil válido
+        is_favorited = bool(user_id) and models.is_github_user_favorited(user_id, user_info.login)
+        return user_info, repos, commits, selected_repo, None, is_favorited
+
+    # Consome as mensagens flash antes do streaming: a sessão é salva antes do corpo ser enviado
+    get_flashed_messages()
+    return _stream_page(
+        "index.html",
+        username=username,
+        commits_page=commits_page,
+        commits_per_page=COMMITS_SHOWN,
+        carregar_perfil=carregar_perfil,
+    )
 
 
 @app.route("/favorite/<github_username>", methods=["POST"])
@@ -220,15 +235,47 @@ def favorite_github_user(github_username):
         flash("Você precisa estar logado para favoritar usuários.")
         return redirect(url_for("index"))
     user_id = session["user_id"]
-    if models.is_github_user_favorited(user_id, github_username):
-        models.remove_github_user_favorite(user_id, github_username)
-        flash(f"Usuário {github_username} removido dos favoritos.")
-    else:
-        models.add_github_user_favorite(user_id, github_username)
+    if models.toggle_github_user_favorite(user_id, github_username):
         flash(f"Usuário {github_username} adicionado aos favoritos.")
+    else:
+        flash(f"Usuário {github_username} removido dos favoritos.")
     return redirect(url_for("index", username=github_username))
 
 
+def hydrate_github_profiles(usernames, max_concurrency=None):
+    """
+    Gera pares (username, user_info) na ordem da lista, buscando os perfis em paralelo
+    com no máximo `max_concurrency` buscas simultâneas. Perfis ainda válidos no cache
+    são devolvidos direto, sem ocupar o pool. user_info é None se o perfil não foi obtido.
+    """
+    max_concurrency = max_concurrency or FAVORITES_CONCURRENCY
+    pending = deque()
+    in_flight = 0
+
+    def pop_oldest():
+        nonlocal in_flight
+        username, info = pending.popleft()
+        if isinstance(info, Future):
+            in_flight -= 1
+            try:
+                info = info.result()
+            except GitHubRateLimitError:
+                info = None
+        return username, info
+
+    for username in usernames:
+        info = github_client.peek(f"/users/{username}")
+        if info is None:
+            # Janela deslizante: só dispara nova busca quando há vaga
+            while in_flight >= max_concurrency:
+                yield pop_oldest()
+            info = _github_executor.submit(metrics.propagate(get_github_user_info), username)
+            in_flight += 1
+        pending.append((username, info))
+    while pending:
+        yield pop_oldest()
+
+
 @app.route("/favoritos")
 def favoritos():
     if "user_id" not in session:
@@ -237,45 +284,61 @@ def favoritos():
     user_id = session["user_id"]
     favoritos_list = models.list_github_favorites(user_id)
 
-    # Renderiza diretamente os favoritos para evitar dependência de template externo
-    html = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8" />
-        <title>Favoritos do GitHub</title>
-        <style>body {{ font-family: Arial, sans-serif; padding: 2em; max-width: 700px; margin: auto; }}</style>
-    </head>
-    <body>
-      <h1>Favoritos</h1>
-      {mensagem}
-      <ul>
-        {favoritos_li}
-      </ul>
-      <a href="{index_url}">Voltar</a>
-    </body>
-    </html>
+    # Os perfis são renderizados à medida que chegam do GitHub (o cabeçalho sai antes)
+    get_flashed_messages()
+    return _stream_page(
+        "favoritos.html",
+        total=len(favoritos_list),
+        favoritos=hydrate_github_profiles(favoritos_list),
+    )
+
+
+@app.route("/stats/<username>")
+def stats(username):
+    """Estatísticas agregadas do usuário do GitHub (linguagens, estrelas/forks e commits por semana)."""
+    info_future = _github_executor.submit(metrics.propagate(get_github_user_info), username)
+    stats_future = _github_executor.submit(metrics.propagate(get_user_stats), username)
+    user_info, user_stats, error = None, None, None
+    try:
+        user_info = info_future.result()
+        if user_info:
+            user_stats = stats_future.result()
+    except GitHubRateLimitError as e:
+        error = str(e)
+    if not error and not user_info:
+        error = "Usuário não encontrado!"
+    elif not error and user_stats is None:
+        error = "Não foi possível conectar ao GitHub."
+    status = 404 if error == "Usuário não encontrado!" else 200
+    with metrics.timed("render", metrics.RENDER_SECONDS, template="stats.html"):
+        html = render_template("stats.html", username=username, user_info=user_info, stats=user_stats, error=error)
+    return html, status
+
+
+@app.route("/search")
+def search():
     """
-    if not favoritos_list:
-        mensagem = "<i>Nenhum favorito ainda.</i>"
-    else:
-        mensagem = f"<p>Total: {len(favoritos_list)}</p>"
-    favoritos_li = ""
-    for fav in favoritos_list:
-        # fav pode ser str (login) ou dict - depende da model
-        if isinstance(fav, dict) and "github_username" in fav:
-            login = fav["github_username"]
-        else:
-            login = str(fav)
-        favoritos_li += f'<li><a href="{url_for("index")}?username={login}">{login}</a></li>'
-    class SafeDict(dict):
-        def __missing__(self, key):
-            return '{' + key + '}'
-    return html.format_map(SafeDict(
-        mensagem=mensagem,
-        favoritos_li=favoritos_li,
-        index_url=url_for("index")
-    ))
+    Busca nos repositórios e mensagens de commit já guardados no índice local (FTS5),
+    sem chamar o GitHub. Logado, a busca fica restrita aos usuários favoritados.
+    """
+    query = request.args.get("q", "").strip()
+    tipo = "commits" if request.args.get("tipo") == "commits" else "repos"
+    page = max(request.args.get("page", 1, type=int), 1)
+    user_id = session.get("user_id")
+    results, error = [], None
+    if query:
+        search_fn = models.search_commits if tipo == "commits" else models.search_repos
+        try:
+            # Um resultado a mais indica se existe próxima página
+            results = search_fn(query, user_id, limit=SEARCH_PER_PAGE + 1, offset=(page - 1) * SEARCH_PER_PAGE)
+        except sqlite3.Error:
+            error = "Não foi possível consultar o índice de busca."
+    with metrics.timed("render", metrics.RENDER_SECONDS, template="search.html"):
+        return render_template(
+            "search.html", query=query, tipo=tipo, page=page, error=error,
+            results=results[:SEARCH_PER_PAGE], has_next=len(results) > SEARCH_PER_PAGE,
+            only_favorites=user_id is not None,
+        )
 
 
 # ATENÇÃO: Vercel/Python Runtime espera o objeto WSGI "app" neste arquivo.
@@ -0,0 +1,188 @@
+"""
+benchmarks/run.py
+
+Gerador de carga para o app Flask, sem acessar o GitHub de verdade.
+
+Sobe a API falsa (benchmarks/stub_server.py), aponta o cliente compartilhado
+para ela (GITHUB_API_URL), usa uma cópia temporária do banco e dispara
+requisições concorrentes contra o `app` de api/index.py pelo cliente de
+teste do Flask (o corpo das páginas em streaming é lido por inteiro). Ao fim,
+mostra por rota a vazão e as latências p50/p95/p99.
+
+    python benchmarks/run.py --requests 200 --concurrency 8
+    python benchmarks/run.py --json resultado.json
+    python benchmarks/run.py --compare resultado.json   # compara com uma rodada anterior
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "api"), os.path.dirname(os.path.abspath(__file__))]
+
+import stub_server  # noqa: E402
+
+# Rotas medidas: nome -> função que monta o caminho da i-ésima requisição.
+# Todos os clientes estão logados (a sessão tem o usuário do benchmark).
+ROUTES = {
+    "home": lambda i, users: "/",
+    "perfil": lambda i, users: f"/?username={users[i % len(users)]}",
+    "commits": lambda i, users: f"/?username={users[i % len(users)]}&repo=repo-{i % 3}",
+    "favoritos": lambda i, users: "/favoritos",
+    "stats": lambda i, users: f"/stats/{users[i % len(users)]}",
+    "busca": lambda i, users: f"/search?q=repo&tipo={'commits' if i % 2 else 'repos'}",
+    "nao_encontrado": lambda i, users: f"/?username=missing{i % len(users)}",
+}
+
+
+def percentile(sorted_values, p):
+    """Percentil p (0-100) pelo método nearest-rank de uma lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+    }
+
+
+def setup_app(args):
+    """Configura o ambiente (API falsa, banco temporário) e importa o app."""
+    server, github = stub_server.start(**stub_server.options_from(args))
+    os.environ["GITHUB_API_URL"] = f"http://127.0.0.1:{server.server_port}"
+    workdir = tempfile.mkdtemp(prefix="github-bench-")
+    os.environ["GITHUB_DISK_CACHE_PATH"] = os.path.join(workdir, "github_cache.db") if args.disk_cache else ""
+
+    import models
+    database = os.path.join(workdir, "database.db")
+    shutil.copy(os.path.join(ROOT, "database.db"), database)
+    models.DATABASE = database
+
+    from index import app  # importado só agora: o cliente lê GITHUB_API_URL na carga do módulo
+
+    models.create_user("Benchmark", "bench@example.com", "x")
+    args.user_id = models.get_user_by_email("bench@example.com")["id"]
+    models.add_github_user_favorites(args.user_id, args.usernames[:args.favorites])
+    return app, server, github, workdir
+
+
+def run_load(app, args):
+    """Executa a carga e retorna (resultados por rota, tempo total)."""
+    routes = [name for name in args.routes if name in ROUTES]
+    jobs = itertools.count()
+    total = args.requests * len(routes)
+    lock = threading.Lock()
+    latencies = {name: [] for name in routes}
+    errors = {name: 0 for name in routes}
+
+    from github_client import github_client
+
+    def worker():
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["user_id"] = args.user_id
+        while True:
+            with lock:
+                i = next(jobs)
+            if i >= total:
+                return
+            name = routes[i % len(routes)]
+            path = ROUTES[name](i // len(routes), args.usernames)
+            if args.cold:
+                github_client.cache.clear()
+            start = time.perf_counter()
+            try:
+                resp = client.get(path)
+                resp.get_data()
+                failed = resp.status_code >= 500
+            except Exception:
+                failed = True
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[name].append(elapsed)
+                errors[name] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    results = {name: summarize(latencies[name], errors[name], elapsed) for name in routes}
+    results["total"] = summarize(
+        [value for values in latencies.values() for value in values], sum(errors.values()), elapsed
+    )
+    return results, elapsed
+
+
+def print_report(results, baseline=None):
+    header = f"{'rota':<16}{'req':>7}{'erros':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        line = (f"{name:<16}{r['requests']:>7}{r['errors']:>7}{r['rps']:>9}"
+                f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+        base = (baseline or {}).get(name)
+        if base and base.get("p95_ms"):
+            delta = 100 * (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+            line += f"   p95 {delta:+.1f}%"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do app contra uma API do GitHub falsa.")
+    parser.add_argument("--requests", type=int, default=100, help="Requisições por rota (padrão: 100)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requisições simultâneas (padrão: 8)")
+    parser.add_argument("--users", type=int, default=20, help="Usuários do GitHub distintos (padrão: 20)")
+    parser.add_argument("--favorites", type=int, default=10, help="Favoritos do usuário logado (padrão: 10)")
+    parser.add_argument("--routes", default=",".join(ROUTES),
+                        help=f"Rotas medidas, separadas por vírgula (padrão: {','.join(ROUTES)})")
+    parser.add_argument("--cold", action="store_true", help="Limpa o cache em memória antes de cada requisição")
+    parser.add_argument("--disk-cache", action="store_true", help="Ativa a camada de cache em disco")
+    parser.add_argument("--json", help="Grava os resultados neste arquivo JSON")
+    parser.add_argument("--compare", help="Arquivo JSON de uma rodada anterior para comparar o p95")
+    stub_server.add_arguments(parser)
+    args = parser.parse_args(argv)
+    args.routes = [name.strip() for name in args.routes.split(",") if name.strip()]
+    args.usernames = [f"bench-user-{i}" for i in range(args.users)]
+
+    app, server, github, workdir = setup_app(args)
+    try:
+        results, elapsed = run_load(app, args)
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print(f"{results['total']['requests']} requisições em {elapsed:.2f}s "
+          f"({github.requests} chamadas à API falsa, {github.not_modified} respostas 304)\n")
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"options": {key: value for key, value in vars(args).items() if key not in ("usernames", "user_id")},
+                       "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+benchmarks/stub_server.py
+
+Servidor HTTP local que imita a API do GitHub para os benchmarks.
+
+As respostas são montadas a partir das fixtures gravadas em
+benchmarks/fixtures (um usuário, um repositório, um commit e um evento reais,
+com o nome do usuário/repositório trocado) e seguem o comportamento da API
+que o app usa: paginação com cabeçalho Link, filtros since/until nos commits,
+ETag com respostas 304, gzip e cabeçalhos X-RateLimit-*. A latência e a taxa
+de erros (502) são configuráveis.
+
+Usuários cujo nome começa com "missing" respondem 404.
+
+    python benchmarks/stub_server.py --port 8765 --latency 0.05 --error-rate 0.01
+    GITHUB_API_URL=http://127.0.0.1:8765 flask --app api/index.py run
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LANGUAGES = ("Python", "JavaScript", "Go", "HTML", "TypeScript", None)
+EVENT_TYPES = ("PushEvent", "WatchEvent", "IssuesEvent", "CreateEvent")
+
+
+def _load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeGitHub:
+    """
+    Gera as respostas da API falsa.
+
+    Parâmetros:
+        repos (int): Repositórios por usuário.
+        commits (int): Commits por repositório (um por hora, do mais recente para o mais antigo).
+        events (int): Eventos por usuário.
+        latency (float): Latência média de cada resposta, em segundos.
+        jitter (float): Variação máxima (para mais ou para menos) da latência, em segundos.
+        error_rate (float): Fração das respostas que falham com 502.
+    """
+
+    def __init__(self, repos=60, commits=200, events=30, latency=0.0, jitter=0.0, error_rate=0.0):
+        self.repos = repos
+        self.commits = commits
+        self.events = events
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.anchor = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        self.templates = {name: _load_fixture(f"{name}.json") for name in ("user", "repo", "commit", "event")}
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        # As listas geradas são reaproveitadas entre requisições (o custo do servidor não entra na medição)
+        self._repos = lru_cache(maxsize=1024)(self._build_repos)
+        self._commits = lru_cache(maxsize=1024)(self._build_commits)
+
+    def _fill(self, name, owner, repo="Hello-World"):
+        text = self.templates[name].replace("octocat", owner).replace("Hello-World", repo)
+        return json.loads(text)
+
+    def user(self, username):
+        item = self._fill("user", username)
+        item["public_repos"] = self.repos
+        return item
+
+    def _build_repos(self, username):
+        items = []
+        for i in range(self.repos):
+            name = f"repo-{i}"
+            item = self._fill("repo", username, name)
+            item.update({
+                "id": 1000000 + i,
+                "language": LANGUAGES[i % len(LANGUAGES)],
+                "size": 50 + 37 * i,
+                "stargazers_count": (i * 7) % 300,
+                "forks_count": (i * 3) % 50,
+                "created_at": _iso(self.anchor - timedelta(days=10 * i + 30)),
+                "pushed_at": _iso(self.anchor - timedelta(days=i, hours=3)),
+            })
+            items.append(item)
+        return items
+
+    def _build_commits(self, owner, repo):
+        items = []
+        for i in range(self.commits):
+            # A SHA depende da posição a partir do commit mais antigo: com add_commits, os antigos não mudam
+            number = self.commits - i
+            item = self._fill("commit", owner, repo)
+            sha = hashlib.sha1(f"{owner}/{repo}/{number}".encode()).hexdigest()
+            date = _iso(self.anchor - timedelta(hours=i))
+            item["sha"] = sha
+            item["html_url"] = f"https://github.com/{owner}/{repo}/commit/{sha}"
+            item["commit"]["message"] = f"Commit {number} em {repo}"
+            item["commit"]["author"]["date"] = date
+            item["commit"]["committer"]["date"] = date
+            items.append(item)
+        return items
+
+    def add_commits(self, count):
+        """Acrescenta `count` commits (um por hora) no topo do histórico de todos os repositórios."""
+        self.commits += count
+        self.anchor += timedelta(hours=count)
+        self._commits.cache_clear()
+
+    def events_for(self, username):
+        items = []
+        for i in range(self.events):
+            item = self._fill("event", username, f"repo-{i % max(1, self.repos)}")
+            item["id"] = str(30000000000 - i)
+            item["type"] = EVENT_TYPES[i % len(EVENT_TYPES)]
+            item["created_at"] = _iso(self.anchor - timedelta(hours=2 * i))
+            items.append(item)
+        return items
+
+    def route(self, path, query):
+        """Retorna (status, corpo, cabeçalhos extras) para o caminho da API."""
+        parts = path.strip("/").split("/")
+        if parts[0] == "users" and len(parts) >= 2:
+            username = parts[1]
+            if username.startswith("missing"):
+                return 404, {"message": "Not Found"}, {}
+            if len(parts) == 2:
+                return 200, self.user(username), {}
+            if parts[2:] == ["repos"]:
+                return self._paginate(path, query, self._repos(username))
+            if parts[2:] == ["events"]:
+                return 200, self.events_for(username), {"X-Poll-Interval": "60"}
+        elif parts[0] == "repos" and parts[3:] == ["commits"]:
+            if parts[1].startswith("missing"):
+                return 404, {"message": "Not Found"}, {}
+            items = self._commits(parts[1], parts[2])
+            since, until = query.get("since"), query.get("until")
+            if since or until:
+                items = [
+                    item for item in items
+                    if (not since or item["commit"]["committer"]["date"] >= since)
+                    and (not until or item["commit"]["committer"]["date"] <= until)
+                ]
+            return self._paginate(path, query, items)
+        return 404, {"message": "Not Found"}, {}
+
+    def _paginate(self, path, query, items):
+        per_page = min(100, int(query.get("per_page", 30)))
+        page = int(query.get("page", 1))
+        headers = {}
+        if page * per_page < len(items):
+            next_query = dict(query, page=page + 1)
+            headers["Link"] = f'<{{base}}{path}?{urlencode(next_query)}>; rel="next"'
+        return 200, items[(page - 1) * per_page:page * per_page], headers
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+
+def _handler(github):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Cabeçalhos e corpo saem em escritas separadas: sem TCP_NODELAY, cada requisição numa
+        # conexão reaproveitada esperaria ~40 ms (Nagle + ACK atrasado), distorcendo a medição.
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with github._lock:
+                github.requests += 1
+            github.delay()
+            parts = urlsplit(self.path)
+            query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+            headers = {
+                "X-RateLimit-Limit": "5000",
+                "X-RateLimit-Remaining": "4999",
+                "X-RateLimit-Reset": str(int(time.time()) + 3600),
+            }
+            if github.error_rate and random.random() < github.error_rate:
+                status, data, extra = 502, {"message": "Server Error"}, {}
+            else:
+                status, data, extra = github.route(parts.path, query)
+            body = json.dumps(data).encode()
+            if status == 200:
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                headers["ETag"] = etag
+                if self.headers.get("If-None-Match") == etag:
+                    with github._lock:
+                        github.not_modified += 1
+                    status, body = 304, b""
+            for name, value in extra.items():
+                headers[name] = value.replace("{base}", f"http://{self.headers['Host']}")
+            if body and "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=1)
+                headers["Content-Encoding"] = "gzip"
+            self.send_response(status)
+            if status != 304:
+                headers["Content-Type"] = "application/json; charset=utf-8"
+            headers["Content-Length"] = str(len(body))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def start(host="127.0.0.1", port=0, **options):
+    """
+    Inicia o servidor em uma thread daemon.
+
+    Retorno:
+        tuple: (servidor, FakeGitHub); a URL base é http://host:servidor.server_port.
+    """
+    github = FakeGitHub(**options)
+    server = ThreadingHTTPServer((host, port), _handler(github))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-github", daemon=True).start()
+    return server, github
+
+
+def add_arguments(parser):
+    """Opções do servidor falso, compartilhadas com benchmarks/run.py."""
+    parser.add_argument("--latency", type=float, default=0.05, help="Latência média por resposta, em segundos (padrão: 0.05)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Variação da latência, em segundos (padrão: 0.02)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 502 (padrão: 0)")
+    parser.add_argument("--repos", type=int, default=60, help="Repositórios por usuário (padrão: 60)")
+    parser.add_argument("--commits", type=int, default=200, help="Commits por repositório (padrão: 200)")
+
+
+def options_from(args):
+    return {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "repos": args.repos,
+        "commits": args.commits,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API falsa do GitHub para benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    server, _ = start(args.host, args.port, **options_from(args))
+    print(f"API falsa do GitHub em http://{args.host}:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,86 @@
-import requests
+import sqlite3
+import threading
+from datetime import datetime
+from urllib.parse import urlencode
+
+from github_client import github_client, GitHubError, GitHubConnectionError, GitHubHTTPError, GitHubRateLimitError
+from github_records import Commit
+import models
+
+def iter_user_repos(username, max_items=None):
+    """
+    Itera sob demanda sobre todos os repositórios públicos de um usuário do GitHub,
+    seguindo a paginação (cabeçalho Link) da API.
+
+    Parâmetros:
+        username (str): Nome do usuário do GitHub.
+        max_items (int): Máximo de repositórios devolvidos; None percorre todos.
+
+    Retorno:
+        generator: Registros Repo (github_records). Levanta GitHubHTTPError (ex.: 404)
+        ou GitHubConnectionError se a API não puder ser consultada.
+    """
+    return github_client.iter_pages(user_repos_url(username, max_items), max_items)
+
+def user_repos_url(username, max_items=None):
+    """Primeira página da lista de repositórios do usuário (a mesma URL em todo o app, para aproveitar o cache)."""
+    per_page = min(100, max_items) if max_items else 100
+    return f'/users/{username}/repos?per_page={per_page}'
+
+# Última versão (id, pushed_at, updated_at) dos repositórios de cada usuário já gravada no índice de busca
+_indexed_repos = {}
+_indexed_repos_lock = threading.Lock()
+_INDEXED_REPOS_MAX = 1024
+
+def index_user_repos(username, repos):
+    """
+    Grava os repositórios no índice de busca local (models.save_indexed_repos), só
+    quando a lista mudou desde a última gravação neste processo: visitas servidas
+    do cache não escrevem no banco. Falhas do banco não afetam quem pediu os repositórios.
+    """
+    fingerprint = frozenset((repo.id, repo.pushed_at, repo.updated_at) for repo in repos)
+    key = username.lower()
+    with _indexed_repos_lock:
+        if _indexed_repos.get(key) == fingerprint:
+            return
+    try:
+        models.save_indexed_repos(username, repos)
+    except sqlite3.Error:
+        return
+    with _indexed_repos_lock:
+        if len(_indexed_repos) >= _INDEXED_REPOS_MAX:
+            _indexed_repos.clear()
+        _indexed_repos[key] = fingerprint
+
+def _iso(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ') if isinstance(value, datetime) else value
+
+def iter_repo_commits(owner, repo, since=None, max_items=None, until=None):
+    """
+    Itera sob demanda sobre os commits de um repositório público do GitHub,
+    do mais recente para o mais antigo, seguindo a paginação da API.
+
+    Parâmetros:
+        owner (str): Dono do repositório.
+        repo (str): Nome do repositório.
+        since (str | datetime): Só devolve commits a partir desta data (ISO 8601).
+        max_items (int): Máximo de commits devolvidos; None percorre todo o histórico.
+        until (str | datetime): Só devolve commits até esta data (ISO 8601).
+
+    Retorno:
+        generator: Registros Commit (github_records). Levanta GitHubHTTPError (ex.: 404)
+        ou GitHubConnectionError se a API não puder ser consultada.
+    """
+    return github_client.iter_pages(repo_commits_url(owner, repo, since, max_items, until), max_items)
+
+def repo_commits_url(owner, repo, since=None, max_items=None, until=None):
+    """Primeira página dos commits do repositório (parâmetros como em iter_repo_commits)."""
+    params = {'per_page': min(100, max_items) if max_items else 100}
+    if since:
+        params['since'] = _iso(since)
+    if until:
+        params['until'] = _iso(until)
+    return f'/repos/{owner}/{repo}/commits?{urlencode(params)}'
 
 def get_user_repos(username):
     """
@@ -8,54 +90,59 @@ def get_user_repos(username):
         username (str): Nome do usuário do GitHub.
 
     Retorno:
-        list: Lista de dicionários representando os repositórios ou None se não foi possível conectar.
+        list: Lista de registros Repo (todas as páginas)
+        ou None se não foi possível conectar. Levanta GitHubRateLimitError se a cota
+        da API estiver esgotada.
     """
-    url = f'https://api.github.com/users/{username}/repos?per_page=100'
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-    }
     try:
-        response = requests.get(url, headers=headers, timeout=8)
-        if response.status_code == 200:
-            repos = response.json()
-            repos.sort(key=lambda repo: repo.get('created_at', ''), reverse=True)
-            return repos
-        elif response.status_code == 404:
-            return []
-        else:
-            return []
-    except requests.ConnectionError:
+        return fetch_user_repos(username)
+    except GitHubRateLimitError:
+        # Cota da API esgotada: propaga para o chamador não confundir com "não encontrado"
+        raise
+    except GitHubHTTPError:
+        # 404 (usuário inexistente) ou outro status de erro da API
+        return []
+    except GitHubConnectionError:
         # Não foi possível conectar ao servidor GitHub (NS_ERROR_CONNECTION_REFUSED, etc)
         return None  # O app Python pode diferenciar e exibir mensagem "Não foi possível conectar"
-    except requests.RequestException:
+    except GitHubError:
         return None
 
-def get_repo_commits(owner, repo):
+def fetch_user_repos(username):
+    """
+    Como get_user_repos, mas levanta os erros da API em vez de convertê-los:
+    GitHubHTTPError (com o status, ex.: 404) ou GitHubConnectionError.
+    """
+    repos = list(iter_user_repos(username))
+    repos.sort(key=lambda repo: repo.created_at or '', reverse=True)
+    index_user_repos(username, repos)
+    return repos
+
+def get_repo_commits(owner, repo, max_items=30):
     """
     Retorna a lista de commits de um repositório público do GitHub.
 
     Parâmetros:
         owner (str): Dono do repositório.
         repo (str): Nome do repositório.
+        max_items (int): Máximo de commits (os mais recentes). O padrão é uma página
+            (30, como a API); None percorre todo o histórico, o que pode custar
+            milhares de requisições em repositórios grandes.
 
     Retorno:
-        list: Lista de dicionários de commits, ou None caso não foi possível conectar.
+        list: Lista de registros Commit, ou None caso não foi possível conectar.
+        Levanta GitHubRateLimitError se a cota da API estiver esgotada.
     """
-    url = f'https://api.github.com/repos/{owner}/{repo}/commits'
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-    }
     try:
-        response = requests.get(url, headers=headers, timeout=8)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 404:
-            return []
-        else:
-            return []
-    except requests.ConnectionError:
+        return list(iter_repo_commits(owner, repo, max_items=max_items))
+    except GitHubRateLimitError:
+        # Cota da API esgotada: propaga para o chamador não confundir com "não encontrado"
+        raise
+    except GitHubHTTPError:
+        return []
+    except GitHubConnectionError:
         return None
-    except requests.RequestException:
+    except GitHubError:
         return None
 
 def get_user_info(username):
@@ -66,21 +153,107 @@ def get_user_info(username):
         username (str): Nome do usuário do GitHub.
 
     Retorno:
-        dict: Dicionário com as informações do usuário, ou None se não encontrado ou não foi possível conectar.
+        User: Registro com as informações do usuário, ou None se não encontrado ou não foi possível conectar.
+        Levanta GitHubRateLimitError se a cota da API estiver esgotada.
     """
-    url = f'https://api.github.com/users/{username}'
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-    }
+    url = f'/users/{username}'
     try:
-        response = requests.get(url, headers=headers, timeout=8)
-        if response.status_code == 200:
-            return response.json()
-        elif response.status_code == 404:
+        status, data = github_client.get_json(url)
+        if status == 200:
+            return data
+        elif status == 404:
             return None
         else:
             return None
-    except requests.ConnectionError:
+    except GitHubRateLimitError:
+        raise
+    except GitHubConnectionError:
         return None
-    except requests.RequestException:
+    except GitHubError:
         return None
+
+def sync_repo_commits(owner, repo, initial_limit=100):
+    """
+    Sincroniza incrementalmente os commits do repositório com o banco local.
+    Na primeira vez guarda os `initial_limit` commits mais recentes; depois pede
+    à API só os commits desde o mais novo já guardado (parâmetro since).
+
+    Retorno:
+        int: Quantidade de commits novos gravados nesta sincronização.
+        Levanta GitHubError (ex.: GitHubHTTPError 404) se a API não puder ser consultada.
+    """
+    params = pending_sync_params(owner, repo, initial_limit)
+    commits = list(iter_repo_commits(owner, repo, **params))
+    if 'since' not in params:
+        models.save_repo_commits(owner, repo, commits, complete=len(commits) < initial_limit)
+        return len(commits)
+    # since é inclusivo: o commit mais novo já guardado sempre volta. Sem commits novos,
+    # não há o que gravar (evita uma transação de escrita a cada visualização).
+    stored = models.stored_commit_shas(owner, repo, (commit.sha for commit in commits))
+    new_commits = [commit for commit in commits if commit.sha not in stored]
+    if new_commits:
+        models.save_repo_commits(owner, repo, new_commits)
+    return len(new_commits)
+
+def pending_sync_params(owner, repo, initial_limit=100):
+    """
+    Parâmetros de iter_repo_commits que sync_repo_commits usaria agora, conforme o
+    estado guardado no banco: {'max_items': initial_limit} na primeira vez,
+    {'since': commit mais novo guardado} depois.
+    """
+    state = models.get_repo_commit_sync(owner, repo)
+    if state is None or not state['newest_committed_at']:
+        return {'max_items': initial_limit}
+    return {'since': state['newest_committed_at']}
+
+def get_synced_commits(owner, repo, page=1, per_page=10):
+    """
+    Retorna uma página de commits a partir do banco local, do mais recente para o mais antigo.
+    Se a página pedida vai além do que já está guardado, busca na API só os commits
+    mais antigos que faltam (parâmetro until) antes de responder.
+
+    Retorno:
+        list: Registros Commit da página (vazia se não houver commits).
+    """
+    offset = (page - 1) * per_page
+    state = models.get_repo_commit_sync(owner, repo)
+    if state is not None and not state['complete']:
+        missing = offset + per_page - models.count_repo_commits(owner, repo)
+        if missing > 0:
+            # until é inclusivo: o commit mais antigo já guardado volta junto
+            older = list(iter_repo_commits(owner, repo, until=state['oldest_committed_at'], max_items=missing + 1))
+            models.save_repo_commits(owner, repo, older, complete=len(older) <= missing)
+    rows = models.list_repo_commits(owner, repo, limit=per_page, offset=offset)
+    return [Commit.from_dict(dict(row)) for row in rows]
+
+def get_repo_commits_page(owner, repo, page=1, per_page=10):
+    """
+    Retorna uma página de commits do repositório, sincronizando antes os commits novos
+    com o banco local. Se o banco estiver indisponível (ex.: sistema de arquivos somente
+    leitura), busca a página direto na API.
+
+    Retorno:
+        list: Registros Commit da página ([] se o repositório não existe),
+        ou None se não foi possível conectar. Levanta GitHubRateLimitError se a cota
+        da API estiver esgotada.
+    """
+    try:
+        return fetch_repo_commits_page(owner, repo, page=page, per_page=per_page)
+    except GitHubRateLimitError:
+        raise
+    except GitHubHTTPError:
+        return []
+    except GitHubError:
+        return None
+
+def fetch_repo_commits_page(owner, repo, page=1, per_page=10):
+    """
+    Como get_repo_commits_page, mas levanta os erros da API em vez de convertê-los:
+    GitHubHTTPError (com o status, ex.: 404) ou GitHubConnectionError.
+    """
+    try:
+        sync_repo_commits(owner, repo)
+        return get_synced_commits(owner, repo, page=page, per_page=per_page)
+    except sqlite3.Error:
+        commits = iter_repo_commits(owner, repo, max_items=page * per_page)
+        return list(commits)[(page - 1) * per_page:]
@@ -2,82 +2,191 @@
 github_activity.py
 
 Script utilitário para consumir a API pública do GitHub
-e exibir atividades recentes (eventos públicos) de um usuário.
+e exibir atividades recentes (eventos públicos) de um ou vários usuários.
+
+Com vários usuários (argumentos ou arquivo com -f), os eventos são buscados
+em paralelo e mesclados em um único feed em ordem cronológica, impresso linha
+a linha em texto ou JSON lines (--json):
+
+    python github_activity.py -f usuarios.txt --workers 16 --json > feed.jsonl
 
 Para integração com Flask, considere mover funções reutilizáveis
 para github.py e importar no app principal. Veja estrutura sugerida em a.txt.
 """
 
-import sys
-import urllib.request
-import ssl
+import argparse
+import heapq
+import itertools
 import json
-from datetime import datetime
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from github_client import github_client
+
+# Buscas simultâneas no modo com vários usuários
+DEFAULT_WORKERS = 8
+
+
+def parse_timestamp(time_iso):
+    """Converte o created_at da API (ISO 8601 em UTC) em timestamp Unix; None se ausente/inválido."""
+    if not time_iso:
+        return None
+    try:
+        return datetime.strptime(time_iso, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def format_timestamp(timestamp):
+    """Formata o timestamp no padrão dd/mm/YYYY HH:MM:SS (UTC), só na hora de exibir."""
+    if timestamp is None:
+        return "Data desconhecida"
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%d/%m/%Y %H:%M:%S")
+
+
+def _describe(tipo, repo, event):
+    if tipo == "PushEvent":
+        commits = event.commit_count or 0
+        return f"Pushed {commits} commits to {repo}"
+    if tipo == "IssuesEvent":
+        action = event.action or "realizou uma ação"
+        return f"{action.capitalize()} uma issue em {repo}"
+    if tipo == "WatchEvent":
+        return f"Starred {repo}"
+    return f"{tipo} em {repo}"
+
+
+def _feed_key(activity):
+    # Mais recentes primeiro; eventos sem data vão para o fim
+    return -(activity["timestamp"] or 0)
+
+
+def activity_from_event(event, username=None):
+    """Converte um github_records.Event no dicionário de atividade usado pelo feed."""
+    tipo = event.type or "Evento"
+    repo = event.repo or "repositório desconhecido"
+    return {
+        "id": event.id,
+        "usuario": event.actor or username,
+        "tipo": tipo,
+        "repositorio": repo,
+        "timestamp": parse_timestamp(event.created_at),
+        "descricao": _describe(tipo, repo, event),
+    }
+
+
+def format_activity(activity):
+    """Linha de texto do feed: [dd/mm/YYYY HH:MM:SS] usuario: descricao."""
+    return f"[{format_timestamp(activity['timestamp'])}] {activity['usuario']}: {activity['descricao']}"
+
+
+def events_url(username):
+    """URL dos eventos públicos do usuário usada por get_github_activity (e pelo pré-carregamento do ASGI)."""
+    return f"/users/{username}/events"
+
 
 def get_github_activity(username):
     """
     Busca eventos públicos recentes de um usuário do GitHub.
-    Retorna uma lista de dicionários com informações formatadas para cada evento,
-    ou levanta uma exceção adequada se houver erro de acesso.
+    Retorna uma lista de dicionários (id, usuario, tipo, repositorio, timestamp, descricao),
+    do evento mais recente para o mais antigo, ou levanta uma exceção adequada se houver
+    erro de acesso. O timestamp é numérico (Unix, UTC); use format_timestamp para exibir.
     """
-    api_url = f"https://api.github.com/users/{username}/events"
-
-    # Ignora verificação SSL para compatibilidade ampla (não recomendado em produção)
-    ctx = ssl._create_unverified_context()
-
-    req = urllib.request.Request(api_url, headers={"User-Agent": "python-urllib"})
+    try:
+        status, data = github_client.get_json(events_url(username))
+    except Exception as e:
+        raise Exception(f"Ocorreu um erro: {e}") from e
+    if status == 404:
+        raise ValueError("Usuário não encontrado.")
+    if status != 200:
+        raise Exception(f"Erro da API: HTTP {status}")
 
     try:
-        with urllib.request.urlopen(req, context=ctx) as resp:
-            if resp.status != 200:
-                raise Exception(f"Erro ao buscar dados: {resp.status}")
-            content = resp.read().decode()
-            if not content.strip():
-                return []
-            data = json.loads(content)
-            if not data:
-                return []
-            activities = []
-            for event in data:
-                tipo = event.get("type", "Evento")
-                repo = event.get("repo", {}).get("name", "repositório desconhecido")
-                time_iso = event.get("created_at")
-                if time_iso:
-                    try:
-                        dt = datetime.strptime(time_iso, "%Y-%m-%dT%H:%M:%SZ")
-                        time_br = dt.strftime("%d/%m/%Y %H:%M:%S")
-                    except Exception:
-                        time_br = time_iso
-                else:
-                    time_br = "Data desconhecida"
-
-                desc = ""
-                if tipo == "PushEvent":
-                    commits = len(event.get("payload", {}).get("commits", []))
-                    desc = f"Pushed {commits} commits to {repo}"
-                elif tipo == "IssuesEvent":
-                    action = event.get("payload", {}).get("action", "realizou uma ação")
-                    desc = f"{action.capitalize()} uma issue em {repo}"
-                elif tipo == "WatchEvent":
-                    desc = f"Starred {repo}"
-                else:
-                    desc = f"{tipo} em {repo}"
-
-                activities.append({
-                    "tipo": tipo,
-                    "repositorio": repo,
-                    "datahora": time_br,
-                    "descricao": desc,
-                })
-            return activities
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            raise ValueError("Usuário não encontrado.")
-        raise Exception(f"Erro da API: {e}") from e
+        if not data:
+            return []
+        activities = [activity_from_event(event, username) for event in data]
+        activities.sort(key=_feed_key)
+        return activities
     except Exception as e:
         raise Exception(f"Ocorreu um erro: {e}") from e
 
 
+def iter_users_activity(usernames, max_workers=DEFAULT_WORKERS):
+    """
+    Busca em paralelo (no máximo `max_workers` buscas simultâneas) as atividades de
+    vários usuários e gera pares (username, resultado) à medida que cada busca termina.
+    resultado é a lista de get_github_activity ou a exceção levantada para aquele usuário.
+    """
+    usernames = iter(usernames)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+
+        def submit_next():
+            for username in usernames:
+                username = username.strip()
+                if username:
+                    running[pool.submit(get_github_activity, username)] = username
+                    return True
+            return False
+
+        # Janela deslizante: a lista de usuários (que pode ter milhares) é consumida aos poucos
+        while len(running) < max_workers and submit_next():
+            pass
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                username = running.pop(future)
+                try:
+                    yield username, future.result()
+                except Exception as e:
+                    yield username, e
+                submit_next()
+
+
+def merge_activity_feed(results, on_error=None):
+    """
+    Junta as listas de atividades de cada usuário (já ordenadas) em um único feed
+    do mais recente para o mais antigo, sem reordenar tudo de novo (heapq.merge).
+    As falhas são repassadas a on_error(username, exc), se informado.
+    """
+    feeds = []
+    for username, result in results:
+        if isinstance(result, Exception):
+            if on_error:
+                on_error(username, result)
+        else:
+            feeds.append(result)
+    return heapq.merge(*feeds, key=_feed_key)
+
+
+def get_github_activity_feed(usernames, max_workers=DEFAULT_WORKERS, ordered=True, on_error=None):
+    """
+    Feed de atividades de vários usuários.
+
+    Parâmetros:
+        usernames (iterable): Nomes de usuário do GitHub.
+        max_workers (int): Máximo de buscas simultâneas.
+        ordered (bool): Se True, gera um único feed em ordem cronológica (mais recente
+            primeiro), que só começa depois de todas as buscas; se False, gera as
+            atividades de cada usuário assim que a busca dele termina.
+        on_error (callable): Chamado com (username, exc) para cada usuário que falhou.
+
+    Retorno:
+        iterator: Dicionários de atividade (ver get_github_activity).
+    """
+    results = iter_users_activity(usernames, max_workers=max_workers)
+    if ordered:
+        yield from merge_activity_feed(results, on_error=on_error)
+        return
+    for username, result in results:
+        if isinstance(result, Exception):
+            if on_error:
+                on_error(username, result)
+        else:
+            yield from result
+
+
 def print_github_activity(username):
     """
     Função utilitária para rodar stand-alone. Imprime as atividades recentes do usuário.
@@ -88,14 +197,73 @@ def print_github_activity(username):
             print("Nenhuma atividade encontrada.")
             return
         for evento in atividades:
-            print(f"[{evento['datahora']}] {evento['descricao']}")
+            print(f"[{format_timestamp(evento['timestamp'])}] {evento['descricao']}")
     except ValueError as ve:
         print(str(ve))
     except Exception as exc:
         print(str(exc))
 
 
+def print_github_activity_feed(usernames, max_workers=DEFAULT_WORKERS, ordered=True, as_json=False, out=None):
+    """
+    Imprime o feed de vários usuários, linha a linha (texto ou JSON lines), à medida
+    que é gerado. Falhas de usuários individuais vão para stderr sem interromper o feed.
+    Retorna a quantidade de usuários que falharam.
+    """
+    out = out or sys.stdout
+    falhas = 0
+
+    def on_error(username, exc):
+        nonlocal falhas
+        falhas += 1
+        print(f"{username}: {exc}", file=sys.stderr)
+
+    for evento in get_github_activity_feed(usernames, max_workers=max_workers, ordered=ordered, on_error=on_error):
+        if as_json:
+            line = json.dumps(evento, ensure_ascii=False, separators=(",", ":"))
+        else:
+            line = format_activity(evento)
+        out.write(line + "\n")
+        out.flush()
+    return falhas
+
+
+def read_usernames(path):
+    """Lê um usuário por linha do arquivo ('-' para stdin), ignorando linhas vazias e comentários (#)."""
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in stream:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atividades públicas recentes de usuários do GitHub.")
+    parser.add_argument("usernames", nargs="*", help="Usuários do GitHub (padrão: vinipedro629)")
+    parser.add_argument("-f", "--file", help="Arquivo com um usuário por linha ('-' para stdin)")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Buscas simultâneas (padrão: {DEFAULT_WORKERS})")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON lines")
+    parser.add_argument("--unordered", action="store_true",
+                        help="Emite cada usuário assim que termina, sem esperar o feed completo")
+    args = parser.parse_args(argv)
+
+    usernames = list(args.usernames) or ([] if args.file else ["vinipedro629"])
+    if not args.file and len(usernames) == 1 and not args.json:
+        # Modo original: um usuário, saída simples
+        print_github_activity(usernames[0])
+        return 0
+    if args.file:
+        usernames = itertools.chain(usernames, read_usernames(args.file))
+    falhas = print_github_activity_feed(
+        usernames, max_workers=max(1, args.workers), ordered=not args.unordered, as_json=args.json
+    )
+    return 1 if falhas else 0
+
+
 if __name__ == "__main__":
-    # Permite passar usuário por linha de comando para testar facilmente, ou usa valor padrão
-    usuario = sys.argv[1] if len(sys.argv) > 1 else "vinipedro629"
-    print_github_activity(usuario)
+    sys.exit(main())
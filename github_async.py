@@ -0,0 +1,317 @@
+"""
+github_async.py
+
+Cliente assíncrono (asyncio) para a API do GitHub, usado pelo modo ASGI
+(api/asgi.py) para esperar as respostas lentas do GitHub sem ocupar uma
+thread por requisição.
+
+Como o cliente síncrono (github_client), usa só a biblioteca padrão: mantém
+um pool de conexões HTTP/1.1 keep-alive por host (streams do asyncio) e fala
+com o GitHub com gzip. Não tem cache nem orçamento próprios: lê e grava no
+mesmo cache (memória e disco) e atualiza o mesmo agendador do cliente
+síncrono, de modo que o que for buscado aqui é servido do cache às rotas
+Flask. O acesso ao cache em disco (SQLite) é feito fora do event loop
+(asyncio.to_thread).
+
+Uma instância deve ser usada por um único event loop.
+"""
+
+import asyncio
+import http.client
+import io
+import os
+import ssl
+import time
+from urllib.parse import urlsplit
+
+import metrics
+from github_cache import endpoint_for
+from github_client import (
+    GitHubConnectionError, GitHubError, GitHubHTTPError, GitHubRateLimitError, GitHubResponse, RETRY_STATUSES,
+    USER_AGENT, github_client, gunzip, next_page_url, note_failure,
+)
+from github_records import project
+from github_scheduler import BACKGROUND, current_priority
+
+# Máximo de requisições simultâneas ao GitHub feitas pelo cliente assíncrono
+ASYNC_MAX_CONCURRENT = int(os.environ.get("GITHUB_ASYNC_MAX_CONCURRENT", "100"))
+
+
+class AsyncGitHubClient:
+    """
+    Cliente assíncrono com pool de conexões persistentes, que compartilha cache
+    e limite de taxa com um GitHubClient.
+
+    Parâmetros:
+        client: Cliente síncrono cujos URL base, caches, agendador e contadores são usados
+            (padrão: github_client compartilhado).
+        max_concurrent (int): Máximo de requisições simultâneas ao GitHub.
+        pool_size (int): Máximo de conexões ociosas mantidas por host.
+    """
+
+    def __init__(self, client=github_client, max_concurrent=ASYNC_MAX_CONCURRENT, pool_size=None):
+        self.client = client
+        self.cache = client.cache
+        self.scheduler = client.scheduler
+        self.max_concurrent = max_concurrent
+        self.pool_size = pool_size or max_concurrent
+        self._ssl_context = ssl.create_default_context()
+        self._pools = {}
+        self._inflight = {}
+        self._slots = None
+
+    def _pool(self, scheme, netloc):
+        return self._pools.setdefault((scheme, netloc), [])
+
+    async def _connect(self, scheme, host):
+        hostname, _, port = host.partition(":")
+        if scheme == "https":
+            opening = asyncio.open_connection(hostname, int(port or 443), ssl=self._ssl_context)
+        else:
+            opening = asyncio.open_connection(hostname, int(port or 80))
+        return await asyncio.wait_for(opening, self.client.connect_timeout)
+
+    def _release(self, pool, conn):
+        if len(pool) < self.pool_size:
+            pool.append(conn)
+        else:
+            conn[1].close()
+
+    @staticmethod
+    async def _exchange(reader, writer, host, target, headers):
+        """Envia o GET e lê a resposta. Retorna (status, cabeçalhos, corpo, manter_conexão)."""
+        lines = [f"GET {target} HTTP/1.1", f"Host: {host}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise http.client.BadStatusLine(status_line)
+        status = int(parts[1])
+        raw_headers = bytearray()
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise http.client.IncompleteRead(bytes(raw_headers))
+            raw_headers += line
+            if line in (b"\r\n", b"\n"):
+                break
+        headers = http.client.parse_headers(io.BytesIO(bytes(raw_headers)))
+
+        keep_alive = headers.get("Connection", "").lower() != "close"
+        if status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0], 16)
+                if size == 0:
+                    # Trailers (se houver), até a linha em branco
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif headers.get("Content-Length") is not None:
+            body = await reader.readexactly(int(headers["Content-Length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return status, headers, body, keep_alive
+
+    async def request(self, path_or_url, headers=None):
+        """
+        Executa um GET reaproveitando uma conexão do pool (versão assíncrona de GitHubClient.request).
+
+        Retorno:
+            GitHubResponse com o corpo já lido (e descomprimido).
+        Levanta GitHubConnectionError se não for possível falar com o servidor.
+        """
+        url = self.client.url_for(path_or_url)
+        parts = urlsplit(url)
+        target = parts.path + ("?" + parts.query if parts.query else "")
+        all_headers = {
+            "User-Agent": USER_AGENT,
+            "Accept": "application/vnd.github+json",
+            "Accept-Encoding": "gzip",
+        }
+        if self.client.token:
+            all_headers["Authorization"] = f"Bearer {self.client.token}"
+        all_headers.update(headers or {})
+        pool = self._pool(parts.scheme, parts.netloc)
+
+        # Como no cliente síncrono: uma conexão ociosa fechada pelo servidor ganha uma nova tentativa
+        for attempt in range(2):
+            conn = pool.pop() if pool else None
+            reused = conn is not None
+            try:
+                if conn is None:
+                    conn = await self._connect(parts.scheme, parts.netloc)
+                status, resp_headers, body, keep_alive = await asyncio.wait_for(
+                    self._exchange(*conn, parts.netloc, target, all_headers), self.client.timeout
+                )
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, http.client.HTTPException,
+                    ValueError) as e:
+                if conn is not None:
+                    conn[1].close()
+                if reused and attempt == 0:
+                    continue
+                raise GitHubConnectionError(f"Não foi possível conectar a {parts.netloc}: {e!r}") from e
+            if keep_alive:
+                self._release(pool, conn)
+            else:
+                conn[1].close()
+            if resp_headers.get("Content-Encoding") == "gzip":
+                body = gunzip(body, url)
+            return GitHubResponse(url, status, resp_headers, body)
+
+    async def _timed_request(self, url, headers=None):
+        self.client.count_request()
+        start = time.perf_counter()
+        status = "error"
+        try:
+            resp = await self.request(url, headers)
+            status = resp.status
+            return resp
+        finally:
+            metrics.record("github", time.perf_counter() - start, metrics.GITHUB_REQUEST_SECONDS,
+                           endpoint=endpoint_for(url), status=status)
+
+    async def _scheduled_request(self, url, headers=None):
+        """
+        Como GitHubClient._scheduled_request: limita as requisições simultâneas,
+        registra o saldo no agendador compartilhado e repete falhas transitórias
+        com backoff (sem bloquear o event loop).
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        scheduler = self.scheduler
+        for attempt in range(scheduler.max_retries + 1):
+            last_attempt = attempt == scheduler.max_retries
+            try:
+                async with self._slots:
+                    resp = await self._timed_request(url, headers)
+            except GitHubConnectionError:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(scheduler.backoff(attempt))
+                continue
+            if scheduler.update(resp.status, resp.headers):
+                metrics.GITHUB_RATE_LIMITED.inc()
+                retry_in = scheduler.seconds_until_reset()
+                if last_attempt or retry_in > scheduler.max_delay:
+                    raise GitHubRateLimitError(resp.status, url, retry_in)
+                await asyncio.sleep(scheduler.backoff(attempt, retry_in))
+                continue
+            if resp.status in RETRY_STATUSES and not last_attempt:
+                await asyncio.sleep(scheduler.backoff(attempt))
+                continue
+            return resp
+
+    async def get_page(self, path_or_url):
+        """
+        Versão assíncrona de GitHubClient.get_page, sobre os mesmos caches: entradas
+        válidas são servidas direto, expiradas são revalidadas (304) e buscas
+        simultâneas pela mesma URL são agrupadas. Falhas são registradas com
+        note_failure, para que a view não repita a busca (ver remember_failures).
+
+        Retorno:
+            tuple: (status, dados, url_proxima_pagina), com dados None quando o status não é 200.
+        """
+        url = self.client.url_for(path_or_url)
+        cached = self.cache.get(url)
+        if cached is not None:
+            return (200,) + cached
+        if self.cache.is_not_found(url):
+            return 404, None, None
+        task = self._inflight.get(url)
+        if task is None:
+            task = self._inflight[url] = asyncio.ensure_future(self._fetch_page(url))
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        try:
+            # shield: quem desistir de esperar não cancela a busca dos demais
+            result = await asyncio.shield(task)
+        except GitHubError as e:
+            note_failure(url, e)
+            raise
+        if result[0] != 200:
+            note_failure(url, result)
+        return result
+
+    async def _offload(self, fn, *args):
+        """Executa fn fora do event loop se houver cache em disco (SQLite); senão, direto."""
+        if self.client.disk_cache is None:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def _fetch_page(self, url):
+        cached = await self._offload(self.client.load_from_disk, url)
+        if cached is not None:
+            return (200,) + cached
+        return await self._revalidate(url)
+
+    async def _revalidate(self, url):
+        """Como GitHubClient._revalidate: busca condicional, cache expirado se faltar saldo."""
+        priority = current_priority()
+        if self.scheduler.budget_low(priority):
+            stale = self.cache.get_stale(url)
+            if stale is not None:
+                return (200,) + stale
+            retry_in = self.scheduler.seconds_until_reset()
+            if retry_in > 0 or priority == BACKGROUND:
+                raise GitHubRateLimitError(429, url, retry_in)
+        try:
+            resp = await self._scheduled_request(url, self.cache.validators(url))
+        except GitHubRateLimitError:
+            stale = self.cache.get_stale(url)
+            if stale is not None:
+                return (200,) + stale
+            raise
+        if resp.status == 304:
+            cached = self.cache.refresh(url)
+            if cached is not None:
+                if self.client.disk_cache is not None:
+                    await asyncio.to_thread(self.client.disk_cache.touch, url, self.cache.ttl_for(url))
+                return (200,) + cached
+            resp = await self._scheduled_request(url)
+        if resp.status == 404:
+            self.cache.set_not_found(url)
+            if self.client.disk_cache is not None:
+                await asyncio.to_thread(self.client.disk_cache.delete, url)
+        if resp.status != 200:
+            return resp.status, None, None
+        data = project(url, resp.json())
+        next_url = next_page_url(resp.headers.get("Link"))
+        await self._offload(
+            self.client.store, url, (data, next_url), resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        )
+        return 200, data, next_url
+
+    async def get_pages(self, path_or_url, max_items=None):
+        """
+        Percorre as páginas como GitHubClient.iter_pages (parando nas mesmas páginas
+        para o mesmo max_items) e retorna a lista de itens.
+        Levanta GitHubHTTPError se alguma página responder com status diferente de 200.
+        """
+        url = self.client.url_for(path_or_url)
+        items = []
+        while url and (max_items is None or len(items) < max_items):
+            status, page, next_url = await self.get_page(url)
+            if status != 200:
+                raise GitHubHTTPError(status, url)
+            items.extend(page)
+            url = next_url
+        return items if max_items is None else items[:max_items]
+
+    def close(self):
+        """Fecha todas as conexões ociosas do pool."""
+        for pool in self._pools.values():
+            while pool:
+                pool.pop()[1].close()
+
+
+# Instância única usada pelo app ASGI
+async_github_client = AsyncGitHubClient()
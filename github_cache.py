@@ -0,0 +1,246 @@
+"""
+github_cache.py
+
+Cache em memória compartilhado pelas funções que consultam a API do GitHub
+(api/index.py, github.py e github_activity.py).
+
+As entradas expiram por TTL (definido por tipo de endpoint) e o cache é
+limitado tanto pelo número de entradas quanto pelo total de bytes; ao
+estourar qualquer um dos limites, as entradas menos usadas recentemente (LRU)
+são descartadas.
+
+Entradas expiradas não são apagadas de imediato: elas guardam os cabeçalhos
+ETag/Last-Modified da resposta original para que a próxima busca seja uma
+requisição condicional (If-None-Match/If-Modified-Since). Um 304 do GitHub
+apenas renova a entrada, sem transferir o corpo nem consumir o limite de taxa.
+
+Respostas 404 (usuário ou repositório inexistente) também são lembradas, por
+um TTL curto, para que buscas repetidas por um nome errado não gastem o
+limite de taxa.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# TTL (em segundos) por tipo de endpoint da API do GitHub
+ENDPOINT_TTLS = {
+    "user": int(os.environ.get("GITHUB_CACHE_TTL_USER", "300")),
+    "repos": int(os.environ.get("GITHUB_CACHE_TTL_REPOS", "300")),
+    "commits": int(os.environ.get("GITHUB_CACHE_TTL_COMMITS", "120")),
+    "events": int(os.environ.get("GITHUB_CACHE_TTL_EVENTS", "60")),
+}
+DEFAULT_TTL = 60
+# TTL (em segundos) das respostas 404 guardadas
+NOT_FOUND_TTL = int(os.environ.get("GITHUB_CACHE_TTL_NOT_FOUND", "60"))
+
+
+def endpoint_for(url):
+    """
+    Classifica a URL da API do GitHub no tipo de endpoint usado para escolher o TTL.
+    """
+    path = url.split("://", 1)[-1].split("?", 1)[0].rstrip("/")
+    parts = path.split("/")[1:]
+    if parts[:1] == ["users"]:
+        if len(parts) == 2:
+            return "user"
+        if parts[2:3] == ["repos"]:
+            return "repos"
+        if parts[2:3] == ["events"]:
+            return "events"
+    elif parts[:1] == ["repos"] and parts[3:4] == ["commits"]:
+        return "commits"
+    return "other"
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "ttl", "etag", "last_modified")
+
+    def __init__(self, value, size, ttl, etag=None, last_modified=None):
+        self.value = value
+        self.size = size
+        self.ttl = ttl
+        self.expires_at = time.monotonic() + ttl
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class TTLCache:
+    """
+    Cache thread-safe com expiração por TTL e descarte LRU.
+
+    Parâmetros:
+        max_entries (int): Número máximo de entradas.
+        max_bytes (int): Soma máxima do tamanho (em bytes) das respostas guardadas.
+        ttls (dict): TTL em segundos por tipo de endpoint.
+        default_ttl (int): TTL usado para endpoints sem TTL próprio.
+        not_found_ttl (int): TTL das respostas 404 guardadas (0 desativa).
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, ttls=None, default_ttl=DEFAULT_TTL,
+                 not_found_ttl=NOT_FOUND_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.not_found_ttl = not_found_ttl
+        self._entries = OrderedDict()
+        # URLs que responderam 404: {url: expira_em}, na ordem de inserção
+        self._not_found = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.revalidations = 0
+        self.stale_hits = 0
+        self.not_found_hits = 0
+
+    def get(self, key):
+        """Retorna o valor em cache ou None se ausente/expirado."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def is_not_found(self, key):
+        """Indica se a chave respondeu 404 há menos de not_found_ttl segundos."""
+        with self._lock:
+            expires_at = self._not_found.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._not_found[key]
+                return False
+            self.not_found_hits += 1
+            return True
+
+    def set_not_found(self, key):
+        """Lembra que a chave respondeu 404 (a entrada guardada, se houver, é descartada)."""
+        if self.not_found_ttl <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._not_found.pop(key, None)
+            self._not_found[key] = time.monotonic() + self.not_found_ttl
+            while len(self._not_found) > self.max_entries:
+                self._not_found.popitem(last=False)
+
+    def get_stale(self, key):
+        """
+        Retorna o valor guardado mesmo que já tenha expirado (ou None se ausente).
+        Usado quando não há saldo de requisições para revalidar a entrada.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.stale_hits += 1
+            return entry.value
+
+    def validators(self, key):
+        """
+        Retorna os cabeçalhos condicionais (If-None-Match/If-Modified-Since)
+        para revalidar a entrada guardada em `key`, ou {} se não houver.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            headers = {}
+            if entry is not None:
+                if entry.etag:
+                    headers["If-None-Match"] = entry.etag
+                if entry.last_modified:
+                    headers["If-Modified-Since"] = entry.last_modified
+            return headers
+
+    def refresh(self, key):
+        """
+        Renova o TTL de uma entrada após uma resposta 304 e retorna seu valor,
+        ou None se a entrada foi descartada nesse meio tempo.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.expires_at = time.monotonic() + entry.ttl
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+            return entry.value
+
+    def ttl_left(self, key):
+        """Segundos de validade restantes da entrada (negativo se expirada), ou None se ausente."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry.expires_at - time.monotonic()
+
+    def ttl_for(self, key, endpoint=None):
+        """TTL (em segundos) aplicado às entradas da chave/endpoint."""
+        return self.ttls.get(endpoint or endpoint_for(key), self.default_ttl)
+
+    def set(self, key, value, size, endpoint=None, etag=None, last_modified=None, ttl=None):
+        """
+        Guarda o valor no cache.
+
+        Parâmetros:
+            key (str): Chave (normalmente a URL consultada).
+            value: Resposta já decodificada.
+            size (int): Tamanho da resposta em bytes, usado no limite de memória.
+            endpoint (str): Tipo de endpoint; se omitido, é deduzido da chave.
+            etag (str): Cabeçalho ETag da resposta, usado na revalidação.
+            last_modified (str): Cabeçalho Last-Modified da resposta.
+            ttl (float): Validade desta entrada; se omitido, usa o TTL do endpoint.
+                Um valor <= 0 guarda a entrada já expirada (só para revalidação).
+        """
+        if size > self.max_bytes:
+            return
+        full_ttl = self.ttl_for(key, endpoint)
+        with self._lock:
+            self._not_found.pop(key, None)
+            if key in self._entries:
+                self._remove(key)
+            entry = _Entry(value, size, full_ttl, etag, last_modified)
+            if ttl is not None:
+                entry.expires_at = time.monotonic() + ttl
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._not_found.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Retorna os contadores do cache (acertos, falhas, revalidações, descartes e ocupação)."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "stale_hits": self.stale_hits,
+                "not_found_hits": self.not_found_hits,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+# Instância única usada por todos os módulos que consultam a API do GitHub
+github_cache = TTLCache(
+    max_entries=int(os.environ.get("GITHUB_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("GITHUB_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+)
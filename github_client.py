@@ -0,0 +1,571 @@
+"""
+github_client.py
+
+Cliente HTTP compartilhado (e thread-safe) para a API do GitHub, usado por
+api/index.py, github.py e github_activity.py.
+
+Mantém um pool de conexões keep-alive por host, reaproveitando o handshake
+TCP/TLS entre chamadas, e um único contexto SSL verificado. As respostas JSON
+são convertidas em registros enxutos (github_records) logo após a
+decodificação e passam pelo cache compartilhado (github_cache), com
+revalidação condicional (If-None-Match/If-Modified-Since) das entradas
+expiradas, e as chamadas respeitam o limite de taxa controlado por
+github_scheduler. Atrás do cache em memória há uma segunda camada em disco
+(github_disk_cache), que sobrevive a cold starts.
+"""
+
+import contextvars
+import gzip
+import http.client
+import json
+import os
+import queue
+import re
+import ssl
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import metrics
+from github_cache import endpoint_for, github_cache
+from github_disk_cache import github_disk_cache
+from github_records import project, dump, load
+from github_scheduler import github_scheduler, current_priority, BACKGROUND
+
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+# Token opcional: autenticadas, as chamadas têm limite de 5000/h em vez de 60/h
+API_TOKEN = os.environ.get("GITHUB_TOKEN") or None
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+
+_LINK_NEXT_RE = re.compile(r'<([^>]+)>\s*;\s*rel="next"')
+
+
+class GitHubError(Exception):
+    """Erro ao consultar a API do GitHub (resposta inválida ou falha de rede)."""
+
+
+class GitHubConnectionError(GitHubError):
+    """Não foi possível conectar ao servidor do GitHub (recusa, timeout, DNS...)."""
+
+
+class GitHubHTTPError(GitHubError):
+    """A API respondeu com um status diferente de 200 durante a paginação."""
+
+    def __init__(self, status, url):
+        super().__init__(f"Erro da API: HTTP {status} em {url}")
+        self.status = status
+        self.url = url
+
+
+class GitHubRateLimitError(GitHubHTTPError):
+    """O limite de requisições da API do GitHub foi atingido (403/429 ou saldo reservado)."""
+
+    def __init__(self, status, url, retry_in=0):
+        super().__init__(status, url)
+        self.retry_in = retry_in
+
+    def __str__(self):
+        minutos = max(1, int(self.retry_in // 60) + (1 if self.retry_in % 60 else 0))
+        return f"Limite de requisições da API do GitHub atingido. Tente novamente em {minutos} min."
+
+
+# Status considerados falhas transitórias (vale tentar de novo)
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Buscas que falharam no contexto atual: {url: GitHubError ou (status, None, None)}
+_request_failures = contextvars.ContextVar("github_request_failures", default=None)
+
+
+@contextmanager
+def remember_failures():
+    """
+    Dentro do bloco, uma busca que já falhou (erro ou status diferente de 200) não é
+    repetida: get_page devolve o mesmo resultado. Usado pelo modo ASGI (api/asgi.py)
+    para que a view não refaça, na thread, a busca que o pré-carregamento não conseguiu.
+    """
+    token = _request_failures.set({})
+    try:
+        yield
+    finally:
+        _request_failures.reset(token)
+
+
+def note_failure(url, outcome):
+    """Registra a falha da busca pela URL, se estiver dentro de remember_failures()."""
+    failures = _request_failures.get()
+    if failures is not None:
+        failures[url] = outcome
+
+
+def _known_failure(url):
+    failures = _request_failures.get()
+    return failures.get(url) if failures else None
+
+
+def gunzip(body, url):
+    """Descomprime um corpo gzip; um corpo truncado ou corrompido levanta GitHubConnectionError."""
+    try:
+        return gzip.decompress(body)
+    except (OSError, EOFError, zlib.error) as e:
+        raise GitHubConnectionError(f"Resposta gzip inválida de {url}: {e!r}") from e
+
+
+def next_page_url(link_header):
+    """Extrai a URL rel="next" de um cabeçalho Link do GitHub (ou None)."""
+    if not link_header:
+        return None
+    match = _LINK_NEXT_RE.search(link_header)
+    return match.group(1) if match else None
+
+
+class SingleFlight:
+    """
+    Deduplica chamadas idênticas em andamento: enquanto a primeira chamada para
+    uma chave não termina, as demais esperam e recebem o mesmo resultado (ou erro).
+    """
+
+    class _Call:
+        __slots__ = ("done", "result", "error")
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """Executa fn() uma única vez por chave entre as chamadas concorrentes."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class GitHubResponse:
+    """Resposta já lida por completo: status, cabeçalhos e corpo em bytes."""
+
+    __slots__ = ("url", "status", "headers", "body")
+
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body)
+        except ValueError as e:
+            raise GitHubError(f"Resposta inválida da API: {e}") from e
+
+
+class GitHubClient:
+    """
+    Cliente com pool de conexões persistentes para a API do GitHub.
+
+    Parâmetros:
+        base_url (str): URL base da API (padrão: variável GITHUB_API_URL ou api.github.com).
+        pool_size (int): Máximo de conexões ociosas mantidas por host.
+        timeout (float): Timeout de leitura, em segundos.
+        connect_timeout (float): Timeout para abrir a conexão, em segundos.
+        cache: Cache de respostas (padrão: github_cache compartilhado).
+        scheduler: Controle do limite de taxa (padrão: github_scheduler compartilhado).
+        disk_cache: Segunda camada de cache em disco (padrão: github_disk_cache; None desativa).
+        token (str): Token enviado em Authorization (padrão: variável GITHUB_TOKEN; None não autentica).
+    """
+
+    def __init__(self, base_url=API_URL, pool_size=10, timeout=8, connect_timeout=4, cache=github_cache,
+                 scheduler=github_scheduler, disk_cache=github_disk_cache, token=API_TOKEN):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.cache = cache
+        self.scheduler = scheduler
+        self.disk_cache = disk_cache
+        self._ssl_context = ssl.create_default_context()
+        self._pools = {}
+        self._inflight = SingleFlight()
+        self._sent_lock = threading.Lock()
+        # Requisições enviadas ao GitHub (inclusive novas tentativas e 304)
+        self.requests_sent = 0
+
+    def url_for(self, path_or_url):
+        """Converte um caminho da API ("/users/x") em URL absoluta."""
+        if "://" in path_or_url:
+            return path_or_url
+        return self.base_url + path_or_url
+
+    def _pool(self, scheme, netloc):
+        # dict.setdefault é atômico no CPython: todas as threads recebem a mesma fila
+        return self._pools.setdefault((scheme, netloc), queue.LifoQueue(maxsize=self.pool_size))
+
+    def _connect(self, scheme, netloc):
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(netloc, timeout=self.connect_timeout, context=self._ssl_context)
+        else:
+            conn = http.client.HTTPConnection(netloc, timeout=self.connect_timeout)
+        conn.connect()
+        conn.sock.settimeout(self.timeout)
+        return conn
+
+    def _release(self, pool, conn):
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, path_or_url, headers=None):
+        """
+        Executa um GET reaproveitando uma conexão do pool.
+
+        Retorno:
+            GitHubResponse com o corpo já lido (e descomprimido).
+        Levanta GitHubConnectionError se não for possível falar com o servidor.
+        """
+        url = self.url_for(path_or_url)
+        parts = urlsplit(url)
+        target = parts.path + ("?" + parts.query if parts.query else "")
+        all_headers = {
+            "User-Agent": USER_AGENT,
+            "Accept": "application/vnd.github+json",
+            "Accept-Encoding": "gzip",
+        }
+        if self.token:
+            all_headers["Authorization"] = f"Bearer {self.token}"
+        all_headers.update(headers or {})
+        pool = self._pool(parts.scheme, parts.netloc)
+
+        # Uma conexão reaproveitada pode ter sido fechada pelo servidor enquanto
+        # estava ociosa; nesse caso tenta de novo uma única vez com conexão nova.
+        for attempt in range(2):
+            try:
+                conn = pool.get_nowait()
+                reused = True
+            except queue.Empty:
+                conn = None
+                reused = False
+            try:
+                if conn is None:
+                    conn = self._connect(parts.scheme, parts.netloc)
+                conn.request("GET", target, headers=all_headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (OSError, http.client.HTTPException) as e:
+                if conn is not None:
+                    conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise GitHubConnectionError(f"Não foi possível conectar a {parts.netloc}: {e}") from e
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(pool, conn)
+            if resp.headers.get("Content-Encoding") == "gzip":
+                body = gunzip(body, url)
+            return GitHubResponse(url, resp.status, resp.headers, body)
+
+    def count_request(self):
+        """Contabiliza uma requisição enviada ao GitHub em requests_sent (também pelo cliente assíncrono)."""
+        with self._sent_lock:
+            self.requests_sent += 1
+
+    def _timed_request(self, url, headers=None):
+        """request() contabilizado em requests_sent e medido (métricas e Server-Timing "github")."""
+        self.count_request()
+        start = time.perf_counter()
+        status = "error"
+        try:
+            resp = self.request(url, headers)
+            status = resp.status
+            return resp
+        finally:
+            metrics.record("github", time.perf_counter() - start, metrics.GITHUB_REQUEST_SECONDS,
+                           endpoint=endpoint_for(url), status=status)
+
+    def _scheduled_request(self, url, headers=None, priority=None):
+        """
+        Executa a requisição dentro de uma vaga do agendador, registrando o saldo
+        informado pelo GitHub. Falhas de rede, 5xx e 429 com espera curta são
+        repetidas com backoff exponencial e jitter.
+        Levanta GitHubRateLimitError se o limite de taxa estiver esgotado.
+        """
+        priority = priority or current_priority()
+        scheduler = self.scheduler
+        for attempt in range(scheduler.max_retries + 1):
+            last_attempt = attempt == scheduler.max_retries
+            try:
+                with scheduler.slot(priority):
+                    resp = self._timed_request(url, headers)
+            except GitHubConnectionError:
+                if last_attempt:
+                    raise
+                time.sleep(scheduler.backoff(attempt))
+                continue
+            if scheduler.update(resp.status, resp.headers):
+                metrics.GITHUB_RATE_LIMITED.inc()
+                retry_in = scheduler.seconds_until_reset()
+                if last_attempt or retry_in > scheduler.max_delay:
+                    raise GitHubRateLimitError(resp.status, url, retry_in)
+                time.sleep(scheduler.backoff(attempt, retry_in))
+                continue
+            if resp.status in RETRY_STATUSES and not last_attempt:
+                time.sleep(scheduler.backoff(attempt))
+                continue
+            return resp
+
+    def fetch(self, path_or_url, headers=None):
+        """
+        GET sem passar pelos caches, mas respeitando o agendador (vagas, saldo e
+        novas tentativas). Útil para quem controla os próprios cabeçalhos condicionais.
+
+        Retorno:
+            GitHubResponse (inclusive 304 e erros HTTP).
+        Levanta GitHubRateLimitError se o limite de taxa estiver esgotado.
+        """
+        return self._scheduled_request(self.url_for(path_or_url), headers)
+
+    def get_page(self, path_or_url):
+        """
+        Faz GET de um recurso JSON passando pelo cache compartilhado.
+        Entradas expiradas são revalidadas com requisição condicional; um 304
+        renova a entrada sem baixar o corpo (e não conta no limite de taxa).
+        O cache guarda também a URL da próxima página (cabeçalho Link).
+        Com o saldo de requisições baixo (ou esgotado), entradas expiradas são
+        servidas do cache em vez de chamar o GitHub. Buscas simultâneas pela
+        mesma URL (e com a mesma prioridade) são agrupadas em uma única requisição.
+        Um 404 recente é respondido do cache, sem nova consulta.
+
+        Retorno:
+            tuple: (status, dados, url_proxima_pagina), com dados None quando o status não é 200.
+        """
+        url = self.url_for(path_or_url)
+        cached = self.cache.get(url)
+        if cached is not None:
+            return (200,) + cached
+        if self.cache.is_not_found(url):
+            return 404, None, None
+        failed = _known_failure(url)
+        if isinstance(failed, GitHubError):
+            raise failed
+        if failed is not None:
+            return failed
+        return self._inflight.do(self._flight_key(url), lambda: self._fetch_page(url))
+
+    @staticmethod
+    def _flight_key(url):
+        """
+        Chave do agrupamento de buscas: inclui a prioridade, porque uma busca em segundo
+        plano pode falhar por limite de taxa (saldo abaixo da reserva) enquanto as
+        páginas ainda têm saldo; elas não devem herdar esse erro.
+        """
+        return current_priority(), url
+
+    def load_from_disk(self, url):
+        """
+        Procura a URL na camada em disco. Uma entrada ainda válida volta para a memória
+        com a validade restante; uma expirada volta já vencida, só para ser revalidada.
+        Retorna o valor se ainda for válido, senão None.
+        """
+        if self.disk_cache is None:
+            return None
+        entry = self.disk_cache.get(url)
+        if entry is None:
+            return None
+        try:
+            value = (load(url, entry.value[0]), entry.value[1])
+        except (TypeError, ValueError, KeyError, IndexError):
+            # JSON válido, mas com formato inesperado: trata como ausente
+            self.disk_cache.delete(url)
+            return None
+        ttl_left = entry.ttl_left()
+        self.cache.set(url, value, entry.size, etag=entry.etag, last_modified=entry.last_modified, ttl=ttl_left)
+        return value if ttl_left > 0 else None
+
+    def store(self, url, value, etag, last_modified):
+        """
+        Grava a resposta (já projetada) nas duas camadas de cache. O tamanho
+        contabilizado é o do JSON compacto dos registros, não o da resposta original.
+        """
+        payload = json.dumps([dump(value[0]), value[1]], separators=(",", ":")).encode()
+        self.cache.set(url, value, len(payload), etag=etag, last_modified=last_modified)
+        if self.disk_cache is not None:
+            self.disk_cache.set(url, payload, self.cache.ttl_for(url), etag=etag, last_modified=last_modified)
+
+    def _fetch_page(self, url):
+        cached = self.load_from_disk(url)
+        if cached is not None:
+            return (200,) + cached
+        return self._revalidate(url)
+
+    def _revalidate(self, url):
+        """Busca a URL no GitHub (condicional, se houver entrada guardada) e atualiza os caches."""
+        priority = current_priority()
+        if self.scheduler.budget_low(priority):
+            stale = self.cache.get_stale(url)
+            if stale is not None:
+                return (200,) + stale
+            retry_in = self.scheduler.seconds_until_reset()
+            if retry_in > 0 or priority == BACKGROUND:
+                raise GitHubRateLimitError(429, url, retry_in)
+        try:
+            resp = self._scheduled_request(url, self.cache.validators(url), priority)
+        except GitHubRateLimitError:
+            stale = self.cache.get_stale(url)
+            if stale is not None:
+                return (200,) + stale
+            raise
+        if resp.status == 304:
+            cached = self.cache.refresh(url)
+            if cached is not None:
+                if self.disk_cache is not None:
+                    self.disk_cache.touch(url, self.cache.ttl_for(url))
+                return (200,) + cached
+            # A entrada foi descartada após o envio dos validadores: busca completa
+            resp = self._scheduled_request(url, priority=priority)
+        if resp.status == 404:
+            self.cache.set_not_found(url)
+            if self.disk_cache is not None:
+                self.disk_cache.delete(url)
+        if resp.status != 200:
+            return resp.status, None, None
+        data = project(url, resp.json())
+        next_url = next_page_url(resp.headers.get("Link"))
+        self.store(
+            url, (data, next_url),
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+        return 200, data, next_url
+
+    def prefetch(self, path_or_url, min_ttl=0):
+        """
+        Revalida a URL antes de expirar: se a entrada guardada (memória ou disco)
+        tiver menos de `min_ttl` segundos de validade, ou não existir, consulta o GitHub
+        (de forma condicional, quando possível) e renova os caches.
+
+        Retorno:
+            bool: True se foi feita uma consulta, False se a entrada ainda estava válida.
+        Levanta GitHubRateLimitError se o limite de taxa estiver esgotado.
+        """
+        url = self.url_for(path_or_url)
+        if self.cache.is_not_found(url):
+            return False
+        ttl_left = self.cache.ttl_left(url)
+        if ttl_left is None:
+            self.load_from_disk(url)
+            ttl_left = self.cache.ttl_left(url)
+        if ttl_left is not None and ttl_left > min_ttl:
+            return False
+        self._inflight.do(self._flight_key(url), lambda: self._revalidate(url))
+        return True
+
+    def peek(self, path_or_url):
+        """Retorna os dados ainda válidos no cache, sem acessar a rede (ou None)."""
+        cached = self.cache.get(self.url_for(path_or_url))
+        return cached[0] if cached is not None else None
+
+    def get_json(self, path_or_url):
+        """
+        Como get_page, mas sem a URL da próxima página.
+
+        Retorno:
+            tuple: (status, dados), com dados None quando o status não é 200.
+        """
+        status, data, _ = self.get_page(path_or_url)
+        return status, data
+
+    def iter_pages(self, path_or_url, max_items=None):
+        """
+        Percorre um recurso paginado seguindo os cabeçalhos Link rel="next",
+        devolvendo os itens sob demanda (uma página em memória por vez).
+
+        Parâmetros:
+            path_or_url (str): Caminho ou URL da primeira página.
+            max_items (int): Limite de itens devolvidos; None percorre tudo.
+        Levanta GitHubHTTPError se alguma página responder com status diferente de 200
+        (GitHubRateLimitError se o limite de taxa estiver esgotado).
+        """
+        url = self.url_for(path_or_url)
+        remaining = max_items
+        while url and (remaining is None or remaining > 0):
+            status, items, next_url = self.get_page(url)
+            if status != 200:
+                raise GitHubHTTPError(status, url)
+            url = next_url
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+            yield from items
+
+    def collect_metrics(self):
+        """Estado do cache e do limite de taxa, no formato dos coletores de metrics.registry."""
+        cache = self.cache.stats()
+        lookups = cache["hits"] + cache["misses"]
+        budget = self.scheduler.snapshot()
+        reset_in = budget["reset_at"] - time.time() if budget["reset_at"] else None
+        return [
+            ("github_cache_hits_total", "counter", "Acertos do cache em memória.", cache["hits"]),
+            ("github_cache_misses_total", "counter", "Falhas do cache em memória.", cache["misses"]),
+            ("github_cache_hit_ratio", "gauge", "Fração de acertos do cache em memória.",
+             cache["hits"] / lookups if lookups else None),
+            ("github_cache_revalidations_total", "counter", "Entradas renovadas por resposta 304.", cache["revalidations"]),
+            ("github_cache_stale_hits_total", "counter", "Entradas expiradas servidas por falta de saldo.",
+             cache["stale_hits"]),
+            ("github_cache_not_found_hits_total", "counter", "Buscas respondidas por um 404 guardado.",
+             cache["not_found_hits"]),
+            ("github_cache_evictions_total", "counter", "Entradas descartadas pelo LRU.", cache["evictions"]),
+            ("github_cache_entries", "gauge", "Entradas no cache em memória.", cache["entries"]),
+            ("github_cache_bytes", "gauge", "Bytes ocupados pelo cache em memória.", cache["bytes"]),
+            ("github_requests_sent_total", "counter", "Requisições enviadas ao GitHub.", self.requests_sent),
+            ("github_requests_coalesced_total", "counter", "Buscas atendidas por uma requisição já em andamento.",
+             self._inflight.coalesced),
+            ("github_requests_in_flight", "gauge", "Requisições ao GitHub em andamento.", budget["active"]),
+            ("github_ratelimit_limit", "gauge", "Limite de requisições da janela atual.", budget["limit"]),
+            ("github_ratelimit_remaining", "gauge", "Requisições restantes na janela atual.", budget["remaining"]),
+            ("github_ratelimit_reset_seconds", "gauge", "Segundos até a renovação do limite.",
+             max(0.0, reset_in) if reset_in is not None else None),
+        ]
+
+    def close(self):
+        """Fecha todas as conexões ociosas do pool."""
+        for pool in list(self._pools.values()):
+            while True:
+                try:
+                    pool.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+# Instância única compartilhada pelos módulos que consultam a API do GitHub
+github_client = GitHubClient(
+    pool_size=int(os.environ.get("GITHUB_POOL_SIZE", "10")),
+    timeout=float(os.environ.get("GITHUB_TIMEOUT", "8")),
+    connect_timeout=float(os.environ.get("GITHUB_CONNECT_TIMEOUT", "4")),
+)
+metrics.registry.register_collector(github_client.collect_metrics)
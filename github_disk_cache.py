@@ -0,0 +1,187 @@
+"""
+github_disk_cache.py
+
+Segunda camada de cache (em disco) para as respostas da API do GitHub.
+
+Fica atrás do cache em memória (github_cache): instâncias serverless recém
+iniciadas encontram aqui as respostas gravadas por instâncias anteriores no
+mesmo arquivo (no Vercel, /tmp), em vez de começarem com o cache vazio.
+
+As respostas são guardadas em SQLite como JSON compacto comprimido com zlib,
+junto com ETag/Last-Modified e o horário de expiração. Cada gravação é uma
+transação (atômica); o arquivo é aberto só no primeiro uso, e qualquer erro
+(disco cheio, arquivo somente leitura, lock demorado) apenas desativa ou pula
+a camada, sem afetar a requisição.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class DiskEntry:
+    __slots__ = ("value", "size", "etag", "last_modified", "expires_at")
+
+    def __init__(self, value, size, etag, last_modified, expires_at):
+        self.value = value
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def ttl_left(self):
+        """Segundos de validade restantes (0 ou negativo se já expirou)."""
+        return self.expires_at - time.time()
+
+
+class DiskCache:
+    """
+    Cache persistente em um arquivo SQLite local, limitado em bytes.
+
+    Parâmetros:
+        path (str): Caminho do arquivo; vazio desativa a camada.
+        max_bytes (int): Tamanho máximo (comprimido) das respostas guardadas.
+        busy_timeout (float): Espera máxima por lock do arquivo, em segundos.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, busy_timeout=0.2):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.busy_timeout = busy_timeout
+        self.enabled = bool(path)
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._writes_since_trim = 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(SCHEMA)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def _run(self, fn):
+        """Executa fn(conn); erros de SQLite/disco desativam (ou pulam) a camada."""
+        if not self.enabled:
+            return None
+        try:
+            return fn(self._connection())
+        except sqlite3.OperationalError as e:
+            # Lock demorado: pula esta operação; outros erros (somente leitura, disco cheio...) desativam
+            if "locked" not in str(e) and "busy" not in str(e):
+                self.enabled = False
+            return None
+        except (sqlite3.Error, OSError):
+            self.enabled = False
+            return None
+
+    def get(self, key):
+        """Retorna a DiskEntry guardada (mesmo expirada) ou None."""
+        def read(conn):
+            row = conn.execute(
+                "SELECT body, etag, last_modified, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            except sqlite3.OperationalError:
+                pass  # a ordem LRU é aproximada; não vale esperar por lock só para isso
+            try:
+                raw = zlib.decompress(row[0])
+                value = json.loads(raw)
+            except (zlib.error, ValueError):
+                # Linha truncada ou corrompida: conta como ausente e é descartada
+                self._delete(conn, key)
+                return None
+            return DiskEntry(value, len(raw), row[1], row[2], row[3])
+        return self._run(read)
+
+    def delete(self, key):
+        """Remove a entrada (ex.: conteúdo que não pôde ser lido)."""
+        self._run(lambda conn: self._delete(conn, key))
+
+    @staticmethod
+    def _delete(conn, key):
+        try:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        except sqlite3.OperationalError:
+            pass  # lock demorado: a entrada será substituída na próxima gravação
+
+    def set(self, key, payload, ttl, etag=None, last_modified=None):
+        """Grava (ou substitui) a resposta, já serializada em JSON (bytes), em uma única transação."""
+        body = zlib.compress(payload)
+        if len(body) > self.max_bytes:
+            return
+
+        def write(conn):
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, expires_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, now + ttl, now, len(body)),
+            )
+            self._writes_since_trim += 1
+            if self._writes_since_trim >= 50:
+                self._writes_since_trim = 0
+                self._trim(conn)
+        self._run(write)
+
+    def touch(self, key, ttl):
+        """Renova a validade de uma entrada revalidada com 304."""
+        self._run(lambda conn: conn.execute(
+            "UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?",
+            (time.time() + ttl, time.time(), key),
+        ))
+
+    def _trim(self, conn):
+        """Remove as entradas acessadas há mais tempo até caber em max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * 0.9)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+            doomed = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((key,))
+                excess -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+
+# Instância única usada pelo cliente compartilhado do GitHub
+github_disk_cache = DiskCache(
+    os.environ.get("GITHUB_DISK_CACHE_PATH", os.path.join(tempfile.gettempdir(), "github_cache.db")),
+    max_bytes=int(os.environ.get("GITHUB_DISK_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+)
@@ -0,0 +1,132 @@
+"""
+github_records.py
+
+Projeções enxutas das respostas da API do GitHub.
+
+As respostas completas são grandes (cerca de 100 chaves por repositório,
+objetos author/committer/verification aninhados em cada commit). Logo após
+decodificar o JSON, o cliente (github_client) converte cada item em um destes
+registros com __slots__, guardando só os campos que a aplicação usa; são eles
+que ficam nos caches.
+"""
+
+from github_cache import endpoint_for
+
+
+class _Record:
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def to_dict(self, compact=False):
+        """Campos do registro como dict (para serializar em JSON); compact omite os campos None."""
+        if compact:
+            return {name: getattr(self, name) for name in self.__slots__ if getattr(self, name) is not None}
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Recria o registro a partir de to_dict()."""
+        return cls(**data)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        campos = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:2])
+        return f"{type(self).__name__}({campos})"
+
+
+class User(_Record):
+    __slots__ = ("id", "login", "name", "avatar_url", "html_url", "bio", "location",
+                 "followers", "following", "public_repos", "created_at", "updated_at")
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+
+class Repo(_Record):
+    __slots__ = ("id", "name", "full_name", "owner", "html_url", "description", "language", "fork",
+                 "stargazers_count", "forks_count", "size", "created_at", "updated_at", "pushed_at")
+
+    @classmethod
+    def from_json(cls, data):
+        fields = {name: data.get(name) for name in cls.__slots__}
+        fields["owner"] = (data.get("owner") or {}).get("login")
+        return cls(**fields)
+
+
+class Commit(_Record):
+    __slots__ = ("sha", "message", "author_name", "author_date", "committed_at", "html_url")
+
+    @classmethod
+    def from_json(cls, data):
+        commit = data.get("commit") or {}
+        author = commit.get("author") or {}
+        return cls(
+            sha=data.get("sha"),
+            message=commit.get("message"),
+            author_name=author.get("name"),
+            author_date=author.get("date"),
+            committed_at=(commit.get("committer") or {}).get("date"),
+            html_url=data.get("html_url"),
+        )
+
+
+class Event(_Record):
+    __slots__ = ("id", "type", "actor", "repo", "created_at", "action", "commit_count")
+
+    @classmethod
+    def from_json(cls, data):
+        payload = data.get("payload") or {}
+        commits = payload.get("commits")
+        return cls(
+            id=data.get("id"),
+            type=data.get("type"),
+            actor=(data.get("actor") or {}).get("login"),
+            repo=(data.get("repo") or {}).get("name"),
+            created_at=data.get("created_at"),
+            action=payload.get("action"),
+            commit_count=len(commits) if commits is not None else payload.get("size"),
+        )
+
+
+# Registro usado por tipo de endpoint (ver github_cache.endpoint_for); os demais ficam como JSON
+RECORD_TYPES = {
+    "user": User,
+    "repos": Repo,
+    "commits": Commit,
+    "events": Event,
+}
+
+
+def project(url, data):
+    """Converte o JSON decodificado da URL nos registros do endpoint correspondente."""
+    record_type = RECORD_TYPES.get(endpoint_for(url))
+    if record_type is None or data is None:
+        return data
+    if isinstance(data, list):
+        return [record_type.from_json(item) for item in data]
+    return record_type.from_json(data)
+
+
+def dump(data):
+    """Converte registros (ou listas de registros) em estruturas serializáveis em JSON."""
+    if isinstance(data, _Record):
+        return data.to_dict(compact=True)
+    if isinstance(data, list):
+        return [dump(item) for item in data]
+    return data
+
+
+def load(url, data):
+    """Inverso de dump(): recria os registros do endpoint da URL."""
+    record_type = RECORD_TYPES.get(endpoint_for(url))
+    if record_type is None or data is None:
+        return data
+    if isinstance(data, list):
+        return [record_type.from_dict(item) for item in data]
+    return record_type.from_dict(data)
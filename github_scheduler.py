@@ -0,0 +1,183 @@
+"""
+github_scheduler.py
+
+Controle central do orçamento de requisições à API do GitHub.
+
+Acompanha os cabeçalhos X-RateLimit-Remaining/X-RateLimit-Reset/Retry-After
+de cada resposta, dá prioridade às requisições interativas (páginas) sobre as
+atualizações em segundo plano e calcula os atrasos de nova tentativa com
+backoff exponencial e jitter.
+"""
+
+import contextvars
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Prioridades das requisições
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_priority = contextvars.ContextVar("github_priority", default=INTERACTIVE)
+
+
+def current_priority():
+    """Prioridade das requisições feitas no contexto atual (padrão: interativa)."""
+    return _priority.get()
+
+
+@contextmanager
+def background_priority():
+    """Marca as requisições feitas dentro do bloco como atualizações em segundo plano."""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _int_header(headers, name):
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RateLimitScheduler:
+    """
+    Agenda as requisições ao GitHub respeitando o limite de taxa.
+
+    Parâmetros:
+        max_concurrent (int): Máximo de requisições simultâneas ao GitHub.
+        background_slots (int): Quantas dessas vagas podem ser usadas por requisições em segundo plano.
+        low_watermark (int): Abaixo deste saldo, requisições interativas passam a usar o cache expirado.
+        reserve (int): Saldo reservado às páginas; abaixo dele, o segundo plano não faz chamadas.
+            Limitado a um quarto do X-RateLimit-Limit informado (ex.: 15 no limite de 60/h sem token).
+        max_retries (int): Novas tentativas para falhas transitórias (rede, 5xx, 429).
+        base_delay (float): Atraso base do backoff exponencial, em segundos.
+        max_delay (float): Atraso máximo entre tentativas, em segundos.
+    """
+
+    def __init__(self, max_concurrent=16, background_slots=4, low_watermark=10, reserve=200,
+                 max_retries=2, base_delay=0.5, max_delay=8.0):
+        self.max_concurrent = max_concurrent
+        self.background_slots = min(background_slots, max_concurrent)
+        self.low_watermark = low_watermark
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.blocked_until = 0.0
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting_interactive = 0
+
+    def update(self, status, headers):
+        """
+        Atualiza o saldo a partir dos cabeçalhos de uma resposta.
+        Retorna True se a resposta indica limite de taxa esgotado (403/429).
+        """
+        remaining = _int_header(headers, "X-RateLimit-Remaining")
+        reset_at = _int_header(headers, "X-RateLimit-Reset")
+        retry_after = _int_header(headers, "Retry-After")
+        with self._cond:
+            if remaining is not None:
+                self.remaining = remaining
+                self.limit = _int_header(headers, "X-RateLimit-Limit") or self.limit
+            if reset_at is not None:
+                self.reset_at = reset_at
+            limited = status == 429 or (status == 403 and (remaining == 0 or retry_after is not None))
+            if limited:
+                if retry_after is not None:
+                    wait_until = time.time() + retry_after
+                else:
+                    wait_until = reset_at if reset_at is not None else time.time() + 60
+                self.blocked_until = max(self.blocked_until, wait_until)
+            return limited
+
+    def seconds_until_reset(self):
+        """Segundos até o GitHub liberar novas requisições (0 se não há bloqueio)."""
+        now = time.time()
+        with self._cond:
+            wait = self.blocked_until - now
+            if self.remaining == 0 and self.reset_at:
+                wait = max(wait, self.reset_at - now)
+            return max(0.0, wait)
+
+    def budget_low(self, priority=None):
+        """
+        Indica se o saldo está baixo demais para a prioridade dada; nesse caso
+        o cliente deve servir entradas expiradas do cache em vez de chamar o GitHub.
+        """
+        priority = priority or current_priority()
+        now = time.time()
+        with self._cond:
+            if now < self.blocked_until:
+                return True
+            if self.remaining is None or (self.reset_at and now >= self.reset_at):
+                return False
+            threshold = self.low_watermark if priority == INTERACTIVE else self._background_reserve()
+            return self.remaining <= threshold
+
+    def _background_reserve(self):
+        # Sem o teto, uma reserva maior que o próprio limite (200 > 60) bloquearia o segundo plano para sempre
+        if self.limit:
+            return min(self.reserve, self.limit // 4)
+        return self.reserve
+
+    @contextmanager
+    def slot(self, priority=None):
+        """
+        Reserva uma vaga para uma requisição. Requisições interativas passam na frente:
+        o segundo plano só usa `background_slots` vagas e espera enquanto houver páginas na fila.
+        """
+        priority = priority or current_priority()
+        with self._cond:
+            if priority == INTERACTIVE:
+                self._waiting_interactive += 1
+                while self._active >= self.max_concurrent:
+                    self._cond.wait()
+                self._waiting_interactive -= 1
+            else:
+                while self._active >= self.background_slots or self._waiting_interactive:
+                    self._cond.wait()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def backoff(self, attempt, retry_after=None):
+        """Atraso antes da tentativa `attempt` (0, 1, ...): backoff exponencial com jitter total."""
+        if retry_after is not None:
+            return min(float(retry_after), self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def snapshot(self):
+        """Estado atual do orçamento (para diagnóstico/métricas)."""
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset_at": self.reset_at,
+                "blocked_until": self.blocked_until,
+                "active": self._active,
+            }
+
+
+# Instância única usada pelo cliente compartilhado do GitHub
+github_scheduler = RateLimitScheduler(
+    max_concurrent=int(os.environ.get("GITHUB_MAX_CONCURRENT", "16")),
+    background_slots=int(os.environ.get("GITHUB_BACKGROUND_SLOTS", "4")),
+    low_watermark=int(os.environ.get("GITHUB_RATELIMIT_LOW_WATERMARK", "10")),
+    reserve=int(os.environ.get("GITHUB_RATELIMIT_RESERVE", "200")),
+    max_retries=int(os.environ.get("GITHUB_MAX_RETRIES", "2")),
+)
@@ -0,0 +1,152 @@
+"""
+github_stats.py
+
+Estatísticas agregadas por usuário do GitHub: bytes por linguagem, totais de
+estrelas e forks e commits por semana.
+
+Os agregados são calculados coluna a coluna sobre os registros Repo já
+projetados (github_records), e os commits por semana são agrupados pelo
+próprio SQLite a partir dos commits sincronizados em repo_commits. O
+resultado fica memorizado por usuário e só é recalculado quando o pushed_at
+de algum repositório muda (ou um repositório é criado/apagado) ou quando
+começa uma nova semana, para o gráfico avançar.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
+
+import models
+from github import get_user_repos, sync_repo_commits
+from github_client import GitHubError, GitHubRateLimitError
+
+# Quantidade de semanas exibidas no gráfico de commits
+STATS_WEEKS = int(os.environ.get("GITHUB_STATS_WEEKS", "12"))
+# Repositórios (os com push mais recente) cujos commits são sincronizados para o gráfico
+STATS_COMMIT_REPOS = int(os.environ.get("GITHUB_STATS_COMMIT_REPOS", "5"))
+# Máximo de usuários com estatísticas memorizadas
+STATS_MEMO_SIZE = 256
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _fingerprint(repos):
+    """Identifica o estado dos repositórios: muda quando algum recebe push, é criado ou apagado."""
+    return frozenset(zip(map(attrgetter("id"), repos), map(attrgetter("pushed_at"), repos)))
+
+
+def language_bytes(repos):
+    """
+    Bytes por linguagem, do maior para o menor. A lista de repositórios só informa
+    a linguagem principal e o tamanho (size, em KB); o tamanho inteiro do repositório
+    é atribuído à linguagem principal, sem chamar /languages para cada um.
+    Retorna pares (linguagem, bytes).
+    """
+    totals = Counter()
+    for language, size in zip(map(attrgetter("language"), repos), map(attrgetter("size"), repos)):
+        if language:
+            totals[language] += (size or 0) * 1024
+    return totals.most_common()
+
+
+def chart_start(weeks=STATS_WEEKS, today=None):
+    """Segunda-feira da semana mais antiga do gráfico de `weeks` semanas que termina hoje."""
+    today = today or datetime.now(timezone.utc).date()
+    return today - timedelta(days=today.weekday() + 7 * (weeks - 1))
+
+
+def weekly_commits(owner, weeks=STATS_WEEKS, today=None):
+    """
+    Commits por semana nas últimas `weeks` semanas (incluindo as sem commits),
+    a partir dos commits sincronizados no banco local.
+    Retorna pares (data da segunda-feira, total), da semana mais antiga para a atual.
+    """
+    first_week = chart_start(weeks, today)
+    counts = dict(models.weekly_commit_counts(owner, first_week.isoformat()))
+    return [
+        (week, counts.get(week.isoformat(), 0))
+        for week in (first_week + timedelta(weeks=i) for i in range(weeks))
+    ]
+
+
+def recent_repos(repos):
+    """Os STATS_COMMIT_REPOS repositórios (exceto forks) com push mais recente."""
+    return sorted(
+        (repo for repo in repos if not repo.fork and repo.pushed_at),
+        key=attrgetter("pushed_at"), reverse=True,
+    )[:STATS_COMMIT_REPOS]
+
+
+def _sync_recent_commits(owner, repos):
+    """Sincroniza os commits dos repositórios com push mais recente (falhas individuais são ignoradas)."""
+    for repo in recent_repos(repos):
+        try:
+            sync_repo_commits(owner, repo.name)
+        except GitHubRateLimitError:
+            raise
+        except GitHubError:
+            continue
+
+
+def compute_user_stats(username, repos, sync_commits=True):
+    """
+    Calcula as estatísticas do usuário a partir da lista de repositórios.
+    Com sync_commits=False, usa só os commits já sincronizados no banco local.
+
+    Retorno:
+        dict: repos, stars, forks, languages [(linguagem, bytes, %)], top_repos
+        (os 5 com mais estrelas) e commits_per_week [(segunda-feira, total)].
+    """
+    stars = sum(filter(None, map(attrgetter("stargazers_count"), repos)))
+    forks = sum(filter(None, map(attrgetter("forks_count"), repos)))
+    languages = language_bytes(repos)
+    total_bytes = sum(size for _, size in languages) or 1
+    try:
+        if sync_commits:
+            _sync_recent_commits(username, repos)
+        commits_per_week = weekly_commits(username)
+    except sqlite3.Error:
+        # Banco indisponível (ex.: sistema de arquivos somente leitura): exibe o resto
+        commits_per_week = []
+    return {
+        "repos": len(repos),
+        "stars": stars,
+        "forks": forks,
+        "languages": [(language, size, round(100 * size / total_bytes, 1)) for language, size in languages],
+        "top_repos": sorted(repos, key=lambda repo: repo.stargazers_count or 0, reverse=True)[:5],
+        "commits_per_week": commits_per_week,
+    }
+
+
+def get_user_stats(username, sync_commits=True):
+    """
+    Estatísticas do usuário, memorizadas enquanto os repositórios não mudarem (e dentro da mesma semana).
+    sync_commits: ver compute_user_stats.
+
+    Retorno:
+        dict: Ver compute_user_stats; None se não foi possível conectar ao GitHub.
+        Levanta GitHubRateLimitError se a cota da API estiver esgotada.
+    """
+    repos = get_user_repos(username)
+    if repos is None:
+        return None
+    key = username.lower()
+    # A semana inicial entra na chave: o gráfico de commits avança mesmo sem novos pushes
+    fingerprint = (_fingerprint(repos), chart_start())
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            _memo.move_to_end(key)
+            return cached[1]
+
+    stats = compute_user_stats(username, repos, sync_commits)
+    with _memo_lock:
+        _memo[key] = (fingerprint, stats)
+        _memo.move_to_end(key)
+        while len(_memo) > STATS_MEMO_SIZE:
+            _memo.popitem(last=False)
+    return stats
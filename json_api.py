@@ -0,0 +1,127 @@
+"""
+json_api.py
+
+Endpoints JSON somente leitura (perfil, repositórios, commits e atividade de
+um usuário do GitHub), pensados para ficarem em cache na borda (CDN).
+
+As respostas são serializadas de forma compacta e levam um ETag forte
+(SHA-256 do corpo, que só depende dos dados do GitHub), Cache-Control com
+s-maxage/stale-while-revalidate e respondem 304 a If-None-Match. Nenhuma
+delas usa a sessão, para que possam ser compartilhadas entre usuários.
+"""
+
+import hashlib
+import json
+import os
+
+from flask import Blueprint, current_app, request
+
+from github import fetch_repo_commits_page, fetch_user_repos
+from github_activity import get_github_activity
+from github_client import GitHubError, GitHubHTTPError, GitHubRateLimitError, github_client
+
+json_api_bp = Blueprint('json_api', __name__)
+
+# Por quanto tempo (em segundos) a CDN pode servir uma resposta expirada enquanto busca outra
+STALE_WHILE_REVALIDATE = int(os.environ.get('API_STALE_WHILE_REVALIDATE', '600'))
+# Por quanto tempo a CDN pode servir uma resposta expirada se o app estiver com erro
+STALE_IF_ERROR = int(os.environ.get('API_STALE_IF_ERROR', '86400'))
+MAX_PER_PAGE = 100
+
+
+def _cache_control(endpoint):
+    """Cache-Control com o mesmo TTL usado pelo cache do GitHub para o tipo de endpoint."""
+    ttl = github_client.cache.ttl_for('', endpoint)
+    return (f'public, max-age={ttl}, s-maxage={ttl}, '
+            f'stale-while-revalidate={STALE_WHILE_REVALIDATE}, stale-if-error={STALE_IF_ERROR}')
+
+
+def _json_response(data, endpoint):
+    """
+    Resposta JSON compacta com ETag forte e cabeçalhos de cache.
+    Responde 304 (sem corpo) se o ETag bater com If-None-Match.
+    """
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(hashlib.sha256(body).hexdigest())
+    response.headers['Cache-Control'] = _cache_control(endpoint)
+    return response.make_conditional(request)
+
+
+def _error(message, status, cache_control='no-store', **headers):
+    response = current_app.response_class(
+        json.dumps({'erro': message}, ensure_ascii=False, separators=(',', ':')),
+        status=status, mimetype='application/json',
+    )
+    response.headers['Cache-Control'] = cache_control
+    response.headers.update(headers)
+    return response
+
+
+def _rate_limited(error):
+    return _error(str(error), 429, **{'Retry-After': str(max(1, int(error.retry_in)))})
+
+
+def _not_found(message='Usuário não encontrado.'):
+    # 404 também pode ficar um pouco em cache: evita que nomes inexistentes cheguem sempre ao app
+    return _error(message, 404, cache_control='public, max-age=60, s-maxage=60')
+
+
+def _unavailable():
+    return _error('Não foi possível conectar ao GitHub.', 502)
+
+
+def _api_error(error, not_found_message='Usuário não encontrado.'):
+    """Resposta para um erro da API do GitHub: 429, 404 (em cache por pouco tempo) ou 502 sem cache."""
+    if isinstance(error, GitHubRateLimitError):
+        return _rate_limited(error)
+    if isinstance(error, GitHubHTTPError) and error.status == 404:
+        return _not_found(not_found_message)
+    return _unavailable()
+
+
+@json_api_bp.route('/users/<username>')
+def user(username):
+    try:
+        status, info = github_client.get_json(f'/users/{username}')
+    except GitHubError as e:
+        return _api_error(e)
+    if status == 404:
+        return _not_found()
+    if status != 200:
+        return _unavailable()
+    return _json_response(info.to_dict(), 'user')
+
+
+@json_api_bp.route('/users/<username>/repos')
+def repos(username):
+    try:
+        user_repos = fetch_user_repos(username)
+    except GitHubError as e:
+        return _api_error(e)
+    return _json_response([repo.to_dict() for repo in user_repos], 'repos')
+
+
+@json_api_bp.route('/users/<username>/repos/<repo>/commits')
+def commits(username, repo):
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 30, type=int), 1), MAX_PER_PAGE)
+    try:
+        repo_commits = fetch_repo_commits_page(username, repo, page=page, per_page=per_page)
+    except GitHubError as e:
+        return _api_error(e, 'Repositório não encontrado.')
+    return _json_response([commit.to_dict() for commit in repo_commits], 'commits')
+
+
+@json_api_bp.route('/users/<username>/activity')
+def activity(username):
+    try:
+        activities = get_github_activity(username)
+    except ValueError:
+        return _not_found()
+    except Exception as e:
+        cause = e.__cause__
+        if isinstance(cause, GitHubRateLimitError):
+            return _rate_limited(cause)
+        return _unavailable()
+    return _json_response(activities, 'events')
@@ -0,0 +1,255 @@
+"""
+metrics.py
+
+Instrumentação do caminho quente: histogramas de duração por rota, por
+chamada à API do GitHub, por consulta ao SQLite e por renderização de
+template, expostos no formato texto do Prometheus (rota /metrics).
+
+Cada requisição também acumula o tempo gasto em cada etapa (github, db,
+render...) para o cabeçalho Server-Timing, enviado nas respostas que não
+são em streaming. O acumulador vive em uma ContextVar; as tarefas enviadas
+ao pool de threads levam uma cópia do contexto (ver propagate) para somarem
+no acumulador da requisição certa.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Limites (em segundos) dos buckets dos histogramas
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _number(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, "")) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_labels_text(key)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # contagem por bucket (não cumulativa), soma e total
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_labels_text(key + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels_text(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_labels_text(key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels_text(key)} {count}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas e coletores exportados em /metrics."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        Registra uma função chamada a cada exportação que retorna tuplas
+        (nome, tipo, ajuda, valor): medidas lidas na hora, como o estado do cache.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, type_, help, value in collector():
+                if value is None:
+                    continue
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {type_}")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Duração das requisições ao app, até o fim do corpo.",
+    ("route", "method", "status"),
+)
+GITHUB_REQUEST_SECONDS = registry.histogram(
+    "github_request_duration_seconds", "Duração das requisições à API do GitHub.", ("endpoint", "status"),
+)
+GITHUB_RATE_LIMITED = registry.counter(
+    "github_rate_limited_total", "Respostas da API do GitHub indicando limite de taxa esgotado (403/429).",
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds", "Duração das consultas ao SQLite.", ("statement",),
+)
+RENDER_SECONDS = registry.histogram(
+    "template_render_duration_seconds", "Duração da renderização dos templates (inclui a espera pelos dados).",
+    ("template",),
+)
+
+
+class RequestTimings:
+    """Tempo acumulado por etapa em uma requisição, para o cabeçalho Server-Timing."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            total, count = self._stages.get(stage, (0.0, 0))
+            self._stages[stage] = (total + seconds, count + 1)
+
+    def header(self):
+        """Valor do Server-Timing: uma entrada por etapa e o total ("app") até agora."""
+        with self._lock:
+            stages = dict(self._stages)
+        entries = [
+            f'{stage};dur={total * 1000:.1f};desc="{count}x"' for stage, (total, count) in stages.items()
+        ]
+        entries.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request():
+    """Inicia o acumulador de etapas da requisição atual e o retorna."""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_timings():
+    return _current.get()
+
+
+def record(stage, seconds, histogram=None, **labels):
+    """Registra a duração de uma etapa no histograma e no Server-Timing da requisição atual."""
+    if histogram is not None:
+        histogram.observe(seconds, **labels)
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def timed(stage, histogram=None, **labels):
+    """Mede o bloco como uma etapa (ver record)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start, histogram, **labels)
+
+
+def propagate(fn):
+    """
+    Retorna fn ligada a uma cópia do contexto atual, para que o trabalho feito
+    em outra thread (ex.: ThreadPoolExecutor) some no Server-Timing desta requisição.
+    """
+    context = contextvars.copy_context()
+
+    @wraps(fn)
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
+
+
+def timed_stream(stream, template):
+    """Envolve o gerador de stream_template, medindo do início até o último pedaço enviado."""
+    start = time.perf_counter()
+    try:
+        yield from stream
+    finally:
+        RENDER_SECONDS.observe(time.perf_counter() - start, template=template)
@@ -1,82 +1,478 @@
 import sqlite3
+import threading
+
+import metrics
 
 DATABASE = 'database.db'
 
+# Pragmas aplicados a cada conexão nova: WAL permite leituras concorrentes com uma
+# escrita, e busy_timeout espera o lock em vez de falhar com "database is locked".
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -8000',
+)
+
+# Migrações do esquema, aplicadas em ordem; a versão atual fica em PRAGMA user_version.
+MIGRATIONS = [
+    # 1: remove favoritos duplicados e garante unicidade de (user_id, github_username)
+    """
+    DELETE FROM user_github_favorites WHERE id NOT IN (
+        SELECT MIN(id) FROM user_github_favorites GROUP BY user_id, github_username
+    );
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_user_github_favorites_user_username
+        ON user_github_favorites (user_id, github_username);
+    """,
+    # 2: armazenamento local de commits por repositório, para sincronização incremental
+    """
+    CREATE TABLE IF NOT EXISTS repo_commits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        owner TEXT NOT NULL,
+        repo TEXT NOT NULL,
+        sha TEXT NOT NULL,
+        message TEXT,
+        author_name TEXT,
+        author_date TEXT,
+        committed_at TEXT,
+        html_url TEXT,
+        UNIQUE (owner, repo, sha)
+    );
+    CREATE INDEX IF NOT EXISTS idx_repo_commits_repo_committed_at
+        ON repo_commits (owner, repo, committed_at);
+    CREATE TABLE IF NOT EXISTS repo_commit_sync (
+        owner TEXT NOT NULL,
+        repo TEXT NOT NULL,
+        newest_committed_at TEXT,
+        oldest_committed_at TEXT,
+        complete INTEGER NOT NULL DEFAULT 0,
+        synced_at TEXT NOT NULL,
+        PRIMARY KEY (owner, repo)
+    );
+    """,
+    # 3: índice de busca textual (FTS5) sobre os repositórios e as mensagens de commit guardados
+    """
+    CREATE TABLE IF NOT EXISTS indexed_repos (
+        id INTEGER PRIMARY KEY,
+        owner TEXT NOT NULL,
+        name TEXT NOT NULL,
+        description TEXT,
+        language TEXT,
+        html_url TEXT,
+        stargazers_count INTEGER,
+        pushed_at TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_indexed_repos_owner ON indexed_repos (owner);
+    CREATE VIRTUAL TABLE IF NOT EXISTS repos_fts USING fts5(
+        name, description, language,
+        content='indexed_repos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+    CREATE TRIGGER IF NOT EXISTS indexed_repos_ai AFTER INSERT ON indexed_repos BEGIN
+        INSERT INTO repos_fts (rowid, name, description, language)
+            VALUES (new.id, new.name, new.description, new.language);
+    END;
+    CREATE TRIGGER IF NOT EXISTS indexed_repos_ad AFTER DELETE ON indexed_repos BEGIN
+        INSERT INTO repos_fts (repos_fts, rowid, name, description, language)
+            VALUES ('delete', old.id, old.name, old.description, old.language);
+    END;
+    CREATE TRIGGER IF NOT EXISTS indexed_repos_au AFTER UPDATE ON indexed_repos
+        WHEN old.name IS NOT new.name OR old.description IS NOT new.description
+            OR old.language IS NOT new.language BEGIN
+        INSERT INTO repos_fts (repos_fts, rowid, name, description, language)
+            VALUES ('delete', old.id, old.name, old.description, old.language);
+        INSERT INTO repos_fts (rowid, name, description, language)
+            VALUES (new.id, new.name, new.description, new.language);
+    END;
+    CREATE VIRTUAL TABLE IF NOT EXISTS commits_fts USING fts5(
+        message, author_name,
+        content='repo_commits', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+    CREATE TRIGGER IF NOT EXISTS repo_commits_ai AFTER INSERT ON repo_commits BEGIN
+        INSERT INTO commits_fts (rowid, message, author_name) VALUES (new.id, new.message, new.author_name);
+    END;
+    CREATE TRIGGER IF NOT EXISTS repo_commits_ad AFTER DELETE ON repo_commits BEGIN
+        INSERT INTO commits_fts (commits_fts, rowid, message, author_name)
+            VALUES ('delete', old.id, old.message, old.author_name);
+    END;
+    CREATE TRIGGER IF NOT EXISTS repo_commits_au AFTER UPDATE ON repo_commits
+        WHEN old.message IS NOT new.message OR old.author_name IS NOT new.author_name BEGIN
+        INSERT INTO commits_fts (commits_fts, rowid, message, author_name)
+            VALUES ('delete', old.id, old.message, old.author_name);
+        INSERT INTO commits_fts (rowid, message, author_name) VALUES (new.id, new.message, new.author_name);
+    END;
+    INSERT INTO commits_fts (commits_fts) VALUES ('rebuild');
+    """,
+]
+
+_local = threading.local()
+_migrated_databases = set()
+_migrate_lock = threading.Lock()
+
+def migrate(conn):
+    """Aplica as migrações pendentes do esquema (idempotente)."""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            conn.executescript(f'BEGIN IMMEDIATE; {script}; PRAGMA user_version = {number};')
+
+class _TimedConnection(sqlite3.Connection):
+    """Conexão que mede cada consulta (métrica db_query_duration_seconds e Server-Timing "db")."""
+
+    def execute(self, sql, parameters=()):
+        with metrics.timed('db', metrics.DB_QUERY_SECONDS, statement=_statement(sql)):
+            return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        with metrics.timed('db', metrics.DB_QUERY_SECONDS, statement=_statement(sql)):
+            return super().executemany(sql, seq_of_parameters)
+
+def _statement(sql):
+    return sql.lstrip().split(None, 1)[0].upper()
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
+    """
+    Retorna a conexão SQLite da thread atual, criando-a (com pragmas e migrações)
+    na primeira chamada. A conexão é reaproveitada; não deve ser fechada pelo chamador.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.database == DATABASE:
+        return conn
+    conn = sqlite3.connect(DATABASE, timeout=5, factory=_TimedConnection)
     conn.row_factory = sqlite3.Row
+    # Em sistema de arquivos somente leitura (ex.: Vercel) o WAL e as migrações
+    # falham; a conexão segue sem eles e as leituras continuam funcionando.
+    for pragma in PRAGMAS:
+        try:
+            conn.execute(pragma)
+        except sqlite3.OperationalError:
+            pass
+    with _migrate_lock:
+        if DATABASE not in _migrated_databases:
+            try:
+                migrate(conn)
+            except sqlite3.OperationalError:
+                pass
+            else:
+                _migrated_databases.add(DATABASE)
+    _local.conn = conn
+    _local.database = DATABASE
     return conn
 
+def close_db_connection():
+    """Fecha a conexão da thread atual (ex.: ao encerrar uma thread de trabalho)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
 def get_user_by_email(email):
     conn = get_db_connection()
-    user = conn.execute(
+    return conn.execute(
         'SELECT * FROM users WHERE email = ?', (email,)
     ).fetchone()
-    conn.close()
-    return user
 
 def get_user_by_id(user_id):
     conn = get_db_connection()
-    user = conn.execute(
+    return conn.execute(
         'SELECT * FROM users WHERE id = ?', (user_id,)
     ).fetchone()
-    conn.close()
-    return user
 
 def create_user(name, email, password_hash):
     conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        'INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
-        (name, email, password_hash)
-    )
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute(
+            'INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
+            (name, email, password_hash)
+        )
 
 # Funções de favoritos do GitHub
 
 def add_github_user_favorite(user_id, github_username):
     """Adiciona um favorito de usuário do GitHub para o usuário app."""
     conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        'INSERT OR IGNORE INTO user_github_favorites (user_id, github_username) VALUES (?, ?)',
-        (user_id, github_username)
-    )
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute(
+            'INSERT OR IGNORE INTO user_github_favorites (user_id, github_username) VALUES (?, ?)',
+            (user_id, github_username)
+        )
 
 def remove_github_user_favorite(user_id, github_username):
     """Remove usuário do GitHub dos favoritos do usuário app."""
     conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        'DELETE FROM user_github_favorites WHERE user_id = ? AND github_username = ?',
-        (user_id, github_username)
-    )
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute(
+            'DELETE FROM user_github_favorites WHERE user_id = ? AND github_username = ?',
+            (user_id, github_username)
+        )
 
 def is_github_user_favorited(user_id, github_username):
     """Verifica se um usuário do GitHub está nos favoritos."""
     conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+    result = conn.execute(
         'SELECT 1 FROM user_github_favorites WHERE user_id = ? AND github_username = ?',
         (user_id, github_username)
-    )
-    result = cur.fetchone()
-    conn.close()
+    ).fetchone()
     return result is not None
 
 def list_github_favorites(user_id):
     """Lista todos os usernames do GitHub favoritados pelo usuário."""
     conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+    results = conn.execute(
         'SELECT github_username FROM user_github_favorites WHERE user_id = ?',
         (user_id,)
-    )
-    results = cur.fetchall()
-    conn.close()
+    ).fetchall()
     return [row['github_username'] for row in results]
+
+# Operações em lote sobre favoritos
+
+# Limite de parâmetros por consulta IN (...) (SQLite antigo aceita no máximo 999)
+_IN_CHUNK = 500
+
+def add_github_user_favorites(user_id, github_usernames):
+    """Adiciona vários usuários do GitHub aos favoritos em uma única transação."""
+    conn = get_db_connection()
+    with conn:
+        conn.executemany(
+            'INSERT OR IGNORE INTO user_github_favorites (user_id, github_username) VALUES (?, ?)',
+            [(user_id, username) for username in github_usernames]
+        )
+
+def remove_github_user_favorites(user_id, github_usernames):
+    """Remove vários usuários do GitHub dos favoritos em uma única transação."""
+    conn = get_db_connection()
+    with conn:
+        conn.executemany(
+            'DELETE FROM user_github_favorites WHERE user_id = ? AND github_username = ?',
+            [(user_id, username) for username in github_usernames]
+        )
+
+def toggle_github_user_favorite(user_id, github_username):
+    """
+    Alterna atomicamente o favorito: remove se existir, adiciona caso contrário.
+    O DELETE já abre a transação de escrita, então envios duplicados simultâneos
+    são serializados pelo SQLite. Retorna True se o usuário ficou favoritado.
+    """
+    conn = get_db_connection()
+    with conn:
+        cur = conn.execute(
+            'DELETE FROM user_github_favorites WHERE user_id = ? AND github_username = ?',
+            (user_id, github_username)
+        )
+        if cur.rowcount:
+            return False
+        conn.execute(
+            'INSERT OR IGNORE INTO user_github_favorites (user_id, github_username) VALUES (?, ?)',
+            (user_id, github_username)
+        )
+        return True
+
+def favorited_github_users(user_id, github_usernames):
+    """Retorna o conjunto dos usernames da lista que estão nos favoritos do usuário app."""
+    conn = get_db_connection()
+    usernames = list(github_usernames)
+    found = set()
+    for start in range(0, len(usernames), _IN_CHUNK):
+        chunk = usernames[start:start + _IN_CHUNK]
+        placeholders = ', '.join('?' * len(chunk))
+        rows = conn.execute(
+            f'SELECT github_username FROM user_github_favorites '
+            f'WHERE user_id = ? AND github_username IN ({placeholders})',
+            (user_id, *chunk)
+        ).fetchall()
+        found.update(row['github_username'] for row in rows)
+    return found
+
+def list_favorited_github_usernames(limit=None):
+    """
+    Usernames do GitHub favoritados por algum usuário app, dos mais favoritados
+    para os menos (limit: no máximo essa quantidade; None lista todos).
+    """
+    conn = get_db_connection()
+    results = conn.execute(
+        'SELECT github_username, COUNT(*) AS total FROM user_github_favorites '
+        'GROUP BY github_username ORDER BY total DESC, github_username LIMIT ?',
+        (-1 if limit is None else limit,)
+    ).fetchall()
+    return [row['github_username'] for row in results]
+
+# Armazenamento local de commits (sincronização incremental com o GitHub)
+
+_COMMIT_COLUMNS = ('sha', 'message', 'author_name', 'author_date', 'committed_at', 'html_url')
+
+def get_repo_commit_sync(owner, repo):
+    """Estado da sincronização de commits do repositório (ou None se nunca sincronizado)."""
+    conn = get_db_connection()
+    return conn.execute(
+        'SELECT * FROM repo_commit_sync WHERE owner = ? AND repo = ?',
+        (owner.lower(), repo.lower())
+    ).fetchone()
+
+def save_repo_commits(owner, repo, commits, complete=None):
+    """
+    Grava (upsert pela SHA) os commits do repositório e atualiza o estado da
+    sincronização (commit mais novo/mais antigo) na mesma transação. O estado
+    (e synced_at) só é regravado quando muda.
+
+    Parâmetros:
+        commits: Objetos com os atributos de _COMMIT_COLUMNS (ex.: github_records.Commit).
+        complete (bool): Se todo o histórico já está no banco; None mantém o valor atual.
+    """
+    owner, repo = owner.lower(), repo.lower()
+    conn = get_db_connection()
+    with conn:
+        conn.executemany(
+            'INSERT INTO repo_commits (owner, repo, sha, message, author_name, author_date, committed_at, html_url) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (owner, repo, sha) DO UPDATE SET '
+            'message = excluded.message, author_name = excluded.author_name, '
+            'author_date = excluded.author_date, committed_at = excluded.committed_at, html_url = excluded.html_url',
+            [(owner, repo) + tuple(getattr(commit, column) for column in _COMMIT_COLUMNS) for commit in commits]
+        )
+        conn.execute(
+            'INSERT INTO repo_commit_sync (owner, repo, newest_committed_at, oldest_committed_at, complete, synced_at) '
+            'SELECT ?, ?, MAX(committed_at), MIN(committed_at), COALESCE(?, 0), CURRENT_TIMESTAMP '
+            'FROM repo_commits WHERE owner = ? AND repo = ? '
+            'ON CONFLICT (owner, repo) DO UPDATE SET '
+            'newest_committed_at = excluded.newest_committed_at, oldest_committed_at = excluded.oldest_committed_at, '
+            'complete = COALESCE(?, repo_commit_sync.complete), synced_at = excluded.synced_at '
+            'WHERE repo_commit_sync.newest_committed_at IS NOT excluded.newest_committed_at '
+            'OR repo_commit_sync.oldest_committed_at IS NOT excluded.oldest_committed_at '
+            'OR repo_commit_sync.complete IS NOT COALESCE(?, repo_commit_sync.complete)',
+            (owner, repo, complete, owner, repo, complete, complete)
+        )
+
+def stored_commit_shas(owner, repo, shas):
+    """Retorna o conjunto das SHAs da lista que já estão guardadas para o repositório."""
+    conn = get_db_connection()
+    shas = list(shas)
+    found = set()
+    for start in range(0, len(shas), _IN_CHUNK):
+        chunk = shas[start:start + _IN_CHUNK]
+        placeholders = ', '.join('?' * len(chunk))
+        rows = conn.execute(
+            f'SELECT sha FROM repo_commits WHERE owner = ? AND repo = ? AND sha IN ({placeholders})',
+            (owner.lower(), repo.lower(), *chunk)
+        ).fetchall()
+        found.update(row['sha'] for row in rows)
+    return found
+
+def list_repo_commits(owner, repo, limit=10, offset=0):
+    """Commits guardados do repositório, do mais recente para o mais antigo."""
+    conn = get_db_connection()
+    return conn.execute(
+        f'SELECT {", ".join(_COMMIT_COLUMNS)} FROM repo_commits WHERE owner = ? AND repo = ? '
+        'ORDER BY committed_at DESC LIMIT ? OFFSET ?',
+        (owner.lower(), repo.lower(), limit, offset)
+    ).fetchall()
+
+def count_repo_commits(owner, repo):
+    """Quantidade de commits guardados do repositório."""
+    conn = get_db_connection()
+    return conn.execute(
+        'SELECT COUNT(*) FROM repo_commits WHERE owner = ? AND repo = ?',
+        (owner.lower(), repo.lower())
+    ).fetchone()[0]
+
+def weekly_commit_counts(owner, since):
+    """
+    Commits guardados nos repositórios do dono, agrupados por semana (segunda-feira)
+    a partir de `since` (ISO 8601). Retorna pares (YYYY-MM-DD da segunda-feira, total).
+    """
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT date(committed_at, 'weekday 0', '-6 days') AS week, COUNT(*) AS total "
+        'FROM repo_commits WHERE owner = ? AND committed_at >= ? GROUP BY week ORDER BY week',
+        (owner.lower(), since)
+    ).fetchall()
+    return [(row['week'], row['total']) for row in rows]
+
+# Busca textual (FTS5) sobre os repositórios e commits guardados
+
+_REPO_COLUMNS = ('id', 'owner', 'name', 'description', 'language', 'html_url', 'stargazers_count', 'pushed_at')
+
+def save_indexed_repos(owner, repos):
+    """
+    Grava (upsert pelo ID do GitHub) os repositórios do dono no índice de busca e
+    remove os que não estão mais na lista. Os gatilhos da migração 3 mantêm o FTS5
+    em dia; linhas sem mudança nos campos indexados não são reindexadas.
+
+    Parâmetros:
+        repos: Objetos com os atributos de _REPO_COLUMNS (ex.: github_records.Repo);
+            o atributo owner é ignorado em favor do parâmetro.
+    """
+    owner = owner.lower()
+    rows = [
+        (repo.id, owner) + tuple(getattr(repo, column) for column in _REPO_COLUMNS[2:])
+        for repo in repos if repo.id is not None
+    ]
+    current = {row[0] for row in rows}
+    conn = get_db_connection()
+    with conn:
+        conn.executemany(
+            f'INSERT INTO indexed_repos ({", ".join(_REPO_COLUMNS)}) VALUES ({", ".join("?" * len(_REPO_COLUMNS))}) '
+            'ON CONFLICT (id) DO UPDATE SET '
+            + ', '.join(f'{column} = excluded.{column}' for column in _REPO_COLUMNS[1:]),
+            rows
+        )
+        stale = [
+            (row['id'],) for row in conn.execute('SELECT id FROM indexed_repos WHERE owner = ?', (owner,))
+            if row['id'] not in current
+        ]
+        if stale:
+            conn.executemany('DELETE FROM indexed_repos WHERE id = ?', stale)
+
+def fts_query(text):
+    """
+    Converte o texto digitado em uma consulta FTS5: cada palavra vira um prefixo
+    entre aspas ("pala"*), e todas precisam aparecer. Retorna None se não houver palavras.
+    """
+    terms = [term.replace('"', '""') for term in text.split()]
+    return ' '.join(f'"{term}"*' for term in terms) or None
+
+def _favorites_filter(column, user_id):
+    """Trecho de WHERE (e parâmetros) que limita `column` aos favoritos do usuário app."""
+    if user_id is None:
+        return '', ()
+    return (f' AND {column} IN (SELECT lower(github_username) FROM user_github_favorites WHERE user_id = ?)',
+            (user_id,))
+
+def search_repos(query, user_id=None, limit=20, offset=0):
+    """
+    Repositórios guardados que casam com `query` (texto digitado), dos mais
+    relevantes (bm25; o nome pesa mais que a descrição) para os menos.
+    user_id: limita aos donos favoritados por esse usuário app.
+    """
+    match = fts_query(query)
+    if match is None:
+        return []
+    where, params = _favorites_filter('r.owner', user_id)
+    conn = get_db_connection()
+    return conn.execute(
+        f'SELECT {", ".join("r." + column for column in _REPO_COLUMNS)} '
+        'FROM repos_fts JOIN indexed_repos r ON r.id = repos_fts.rowid '
+        f'WHERE repos_fts MATCH ?{where} '
+        'ORDER BY bm25(repos_fts, 10.0, 2.0, 1.0), r.stargazers_count DESC LIMIT ? OFFSET ?',
+        (match, *params, limit, offset)
+    ).fetchall()
+
+def search_commits(query, user_id=None, limit=20, offset=0):
+    """
+    Commits guardados cuja mensagem (ou autor) casa com `query`, dos mais
+    relevantes (bm25) para os menos; empates vão para os mais recentes.
+    user_id: limita aos donos favoritados por esse usuário app.
+    """
+    match = fts_query(query)
+    if match is None:
+        return []
+    where, params = _favorites_filter('c.owner', user_id)
+    conn = get_db_connection()
+    return conn.execute(
+        f'SELECT c.owner, c.repo, {", ".join("c." + column for column in _COMMIT_COLUMNS)} '
+        'FROM commits_fts JOIN repo_commits c ON c.id = commits_fts.rowid '
+        f'WHERE commits_fts MATCH ?{where} '
+        'ORDER BY bm25(commits_fts, 5.0, 1.0), c.committed_at DESC LIMIT ? OFFSET ?',
+        (match, *params, limit, offset)
+    ).fetchall()
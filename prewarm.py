@@ -0,0 +1,185 @@
+"""
+prewarm.py
+
+Mantém "quentes" os dados dos usuários do GitHub favoritados no app.
+
+Os usernames favoritados (em todos os usuários do app) são ordenados por
+popularidade, e para cada um o perfil, os repositórios e os commits recentes
+são revalidados antes de expirar, com prioridade de segundo plano e dentro de
+um orçamento de requisições por rodada. Assim a primeira visita a um favorito
+depois de um tempo ocioso é servida do cache, sem esperar pelo GitHub.
+
+Pode rodar como thread dentro do app (GITHUB_PREWARM=1) ou pelo cron:
+
+    */5 * * * * python prewarm.py --budget 300
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import models
+from github import sync_repo_commits, user_repos_url
+from github_client import GitHubError, GitHubRateLimitError, github_client
+from github_scheduler import background_priority
+from github_stats import get_user_stats, recent_repos
+
+# Máximo de requisições ao GitHub por rodada
+PREWARM_BUDGET = int(os.environ.get("GITHUB_PREWARM_BUDGET", "300"))
+# Entradas com menos que isso de validade (em segundos) são revalidadas
+PREWARM_MIN_TTL = int(os.environ.get("GITHUB_PREWARM_MIN_TTL", "120"))
+# Quantidade de favoritos (os mais populares) considerados em cada rodada
+PREWARM_MAX_USERS = int(os.environ.get("GITHUB_PREWARM_MAX_USERS", "200"))
+# Intervalo entre rodadas da thread, em segundos
+PREWARM_INTERVAL = int(os.environ.get("GITHUB_PREWARM_INTERVAL", "120"))
+
+
+def prewarm_user(username, min_ttl=PREWARM_MIN_TTL, client=github_client, budget=None):
+    """
+    Revalida o perfil e todas as páginas de repositórios do usuário que estejam perto de
+    expirar, e sincroniza os commits dos repositórios com push mais recente. Para antes
+    de passar de `budget` requisições ao GitHub (None: sem limite).
+
+    Retorno:
+        bool: False se parou antes do fim por ter esgotado o orçamento.
+        Levanta GitHubRateLimitError se o limite de taxa (ou a reserva das páginas) for atingido.
+    """
+    start = client.requests_sent
+
+    def exhausted():
+        return budget is not None and client.requests_sent - start >= budget
+
+    client.prefetch(f"/users/{username}", min_ttl)
+    url = user_repos_url(username)
+    repos = []
+    while url:
+        if exhausted():
+            return False
+        client.prefetch(url, min_ttl)
+        status, page, url = client.get_page(url)
+        if status != 200:
+            return True
+        repos.extend(page)
+    for repo in recent_repos(repos):
+        if exhausted():
+            return False
+        try:
+            sync_repo_commits(username, repo.name)
+        except GitHubRateLimitError:
+            raise
+        except GitHubError:
+            continue
+    # Commits já sincronizados acima: calcula (e memoriza) as estatísticas sem nova sincronização
+    get_user_stats(username, sync_commits=False)
+    return True
+
+
+def run_prewarm(budget=PREWARM_BUDGET, min_ttl=PREWARM_MIN_TTL, max_users=PREWARM_MAX_USERS, client=github_client):
+    """
+    Executa uma rodada sobre os favoritos, dos mais populares para os menos,
+    até esgotar o orçamento de requisições.
+
+    Retorno:
+        dict: users (favoritos considerados), warmed (processados), requests (enviadas ao GitHub)
+        e rate_limited (se a rodada parou pelo limite de taxa).
+    """
+    usernames = models.list_favorited_github_usernames(max_users)
+    start = client.requests_sent
+    warmed = 0
+    rate_limited = False
+    with background_priority():
+        for username in usernames:
+            remaining = budget - (client.requests_sent - start)
+            if remaining <= 0:
+                break
+            try:
+                complete = prewarm_user(username, min_ttl, client, remaining)
+            except GitHubRateLimitError:
+                rate_limited = True
+                break
+            except (GitHubError, sqlite3.Error) as e:
+                print(f"{username}: {e}", file=sys.stderr)
+            else:
+                if not complete:
+                    break
+                warmed += 1
+    return {
+        "users": len(usernames),
+        "warmed": warmed,
+        "requests": client.requests_sent - start,
+        "rate_limited": rate_limited,
+    }
+
+
+class PrewarmWorker(threading.Thread):
+    """
+    Thread que executa run_prewarm a cada `interval` segundos até stop().
+    """
+
+    def __init__(self, interval=PREWARM_INTERVAL, **options):
+        super().__init__(name="github-prewarm", daemon=True)
+        self.interval = interval
+        self.options = options
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                run_prewarm(**self.options)
+            except Exception as e:
+                print(f"prewarm: {e}", file=sys.stderr)
+            finally:
+                # Cada thread tem sua própria conexão com o banco (models)
+                models.close_db_connection()
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_prewarm_worker(**options):
+    """Inicia (uma única vez por processo) a thread de pré-aquecimento e a retorna."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = PrewarmWorker(**options)
+            _worker.start()
+        return _worker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Revalida os dados dos usuários do GitHub favoritados no app.")
+    parser.add_argument("--budget", type=int, default=PREWARM_BUDGET,
+                        help=f"Máximo de requisições ao GitHub por rodada (padrão: {PREWARM_BUDGET})")
+    parser.add_argument("--min-ttl", type=int, default=PREWARM_MIN_TTL,
+                        help=f"Revalida entradas com menos que isso de validade, em segundos (padrão: {PREWARM_MIN_TTL})")
+    parser.add_argument("--max-users", type=int, default=PREWARM_MAX_USERS,
+                        help=f"Favoritos mais populares considerados (padrão: {PREWARM_MAX_USERS})")
+    parser.add_argument("--loop", action="store_true", help="Repete a rodada a cada --interval segundos")
+    parser.add_argument("--interval", type=int, default=PREWARM_INTERVAL,
+                        help=f"Intervalo entre rodadas com --loop, em segundos (padrão: {PREWARM_INTERVAL})")
+    args = parser.parse_args(argv)
+
+    options = {"budget": args.budget, "min_ttl": args.min_ttl, "max_users": args.max_users}
+    if args.loop:
+        worker = PrewarmWorker(interval=args.interval, **options)
+        worker.start()
+        try:
+            while worker.is_alive():
+                worker.join(1)
+        except KeyboardInterrupt:
+            worker.stop()
+        return 0
+    print(json.dumps(run_prewarm(**options)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
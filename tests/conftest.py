@@ -0,0 +1,73 @@
+"""
+Fixtures compartilhadas: a API falsa do GitHub (benchmarks/stub_server.py),
+o cliente compartilhado apontado para ela com caches e agendador novos, e um
+banco SQLite temporário com o esquema base do app.
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (ROOT, os.path.join(ROOT, "benchmarks")):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+import models  # noqa: E402
+import stub_server  # noqa: E402
+from github_cache import TTLCache  # noqa: E402
+from github_client import SingleFlight, github_client  # noqa: E402
+from github_scheduler import RateLimitScheduler  # noqa: E402
+
+# Tabelas que já existiam em database.db antes das migrações de models.MIGRATIONS
+BASE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL
+);
+CREATE TABLE user_github_favorites (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    github_username TEXT NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+"""
+
+
+@pytest.fixture
+def fake_github():
+    """API falsa do GitHub, sem latência: (url_base, FakeGitHub)."""
+    server, github = stub_server.start(repos=5, commits=150, events=5)
+    yield f"http://127.0.0.1:{server.server_port}", github
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(fake_github, monkeypatch):
+    """O github_client compartilhado, apontado para a API falsa, com caches e agendador vazios."""
+    base_url, _ = fake_github
+    monkeypatch.setattr(github_client, "base_url", base_url)
+    monkeypatch.setattr(github_client, "cache", TTLCache())
+    monkeypatch.setattr(github_client, "scheduler", RateLimitScheduler(base_delay=0.01))
+    monkeypatch.setattr(github_client, "disk_cache", None)
+    monkeypatch.setattr(github_client, "_inflight", SingleFlight())
+    monkeypatch.setattr(github_client, "_pools", {})
+    yield github_client
+    github_client.close()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Banco temporário com o esquema base; as migrações rodam na primeira conexão."""
+    path = str(tmp_path / "database.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(BASE_SCHEMA)
+    conn.close()
+    monkeypatch.setattr(models, "DATABASE", path)
+    yield path
+    models.close_db_connection()
@@ -0,0 +1,72 @@
+"""Sincronização incremental de commits (github.sync_repo_commits / get_synced_commits)."""
+
+import models
+from github import get_synced_commits, sync_repo_commits
+
+OWNER, REPO = "alice", "repo-0"
+
+
+def stored_numbers(owner=OWNER, repo=REPO):
+    """Números ("Commit N") dos commits guardados, do mais recente para o mais antigo."""
+    rows = models.list_repo_commits(owner, repo, limit=1000)
+    return [int(row["message"].split()[1]) for row in rows]
+
+
+def test_first_sync_stores_newest_commits(client, db, fake_github):
+    assert sync_repo_commits(OWNER, REPO) == 100
+
+    assert stored_numbers() == list(range(150, 50, -1))
+    state = models.get_repo_commit_sync(OWNER, REPO)
+    assert not state["complete"]
+    assert state["newest_committed_at"] > state["oldest_committed_at"]
+
+
+def test_first_sync_of_short_history_is_complete(client, db, fake_github):
+    _, github = fake_github
+    github.commits = 40
+
+    assert sync_repo_commits(OWNER, REPO) == 40
+    assert models.get_repo_commit_sync(OWNER, REPO)["complete"]
+
+
+def test_resync_without_new_commits_writes_nothing(client, db, fake_github):
+    sync_repo_commits(OWNER, REPO)
+    state = dict(models.get_repo_commit_sync(OWNER, REPO))
+    client.cache.clear()
+
+    # since é inclusivo: a API devolve de novo o commit mais novo, que não conta como novo
+    assert sync_repo_commits(OWNER, REPO) == 0
+    assert models.count_repo_commits(OWNER, REPO) == 100
+    assert dict(models.get_repo_commit_sync(OWNER, REPO)) == state
+
+
+def test_resync_stores_only_new_commits(client, db, fake_github):
+    _, github = fake_github
+    sync_repo_commits(OWNER, REPO)
+    github.add_commits(3)
+
+    assert sync_repo_commits(OWNER, REPO) == 3
+    assert stored_numbers()[:4] == [153, 152, 151, 150]
+    assert models.count_repo_commits(OWNER, REPO) == 103
+
+
+def test_older_pages_are_fetched_with_until_without_duplicates(client, db, fake_github):
+    sync_repo_commits(OWNER, REPO)
+
+    # Página além do que está guardado: busca só os mais antigos (until inclusivo)
+    page = get_synced_commits(OWNER, REPO, page=11, per_page=10)
+    assert [commit.message for commit in page] == [f"Commit {n} em {REPO}" for n in range(50, 40, -1)]
+    assert models.count_repo_commits(OWNER, REPO) == 110
+    assert not models.get_repo_commit_sync(OWNER, REPO)["complete"]
+
+    # Até o commit mais antigo: o histórico fica completo e nada mais é buscado
+    page = get_synced_commits(OWNER, REPO, page=15, per_page=10)
+    assert [commit.message for commit in page][-1] == f"Commit 1 em {REPO}"
+    assert get_synced_commits(OWNER, REPO, page=16, per_page=10) == []
+    assert models.get_repo_commit_sync(OWNER, REPO)["complete"]
+    assert stored_numbers() == list(range(150, 0, -1))
+
+    _, github = fake_github
+    requests = github.requests
+    assert get_synced_commits(OWNER, REPO, page=20, per_page=10) == []
+    assert github.requests == requests
@@ -0,0 +1,136 @@
+"""Cliente compartilhado: agrupamento de buscas, prioridades, cache em disco e 404 guardado."""
+
+import threading
+import time
+
+import pytest
+
+from github_client import GitHubRateLimitError
+from github_disk_cache import DiskCache
+from github_scheduler import BACKGROUND, INTERACTIVE, RateLimitScheduler, background_priority
+
+
+def limit_headers(limit, remaining):
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(time.time()) + 3600),
+    }
+
+
+def test_concurrent_fetches_share_one_request(client, fake_github):
+    _, github = fake_github
+    github.latency = 0.2
+    results = []
+
+    def fetch():
+        results.append(client.get_json("/users/alice"))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert github.requests == 1
+    assert client._inflight.coalesced == 7
+    assert all(status == 200 and data.login == "alice" for status, data in results)
+
+
+def test_background_fetch_does_not_spend_the_page_reserve(client, fake_github):
+    _, github = fake_github
+    # Sem token (60/h), a reserva do segundo plano fica em um quarto do limite
+    client.scheduler.update(200, limit_headers(60, 10))
+
+    with background_priority(), pytest.raises(GitHubRateLimitError):
+        client.get_page("/users/alice")
+    assert github.requests == 0
+
+    status, data, _ = client.get_page("/users/alice")
+    assert status == 200 and data.login == "alice"
+    assert github.requests == 1
+
+
+def test_background_reserve_is_capped_by_the_reported_limit():
+    scheduler = RateLimitScheduler(reserve=200, low_watermark=10)
+    scheduler.update(200, limit_headers(60, 59))
+    assert not scheduler.budget_low(BACKGROUND)
+    assert not scheduler.budget_low(INTERACTIVE)
+
+    scheduler.update(200, limit_headers(60, 15))
+    assert scheduler.budget_low(BACKGROUND)
+    assert not scheduler.budget_low(INTERACTIVE)
+
+    scheduler.update(200, limit_headers(5000, 200))
+    assert scheduler.budget_low(BACKGROUND)
+
+
+def test_interactive_requests_get_the_next_free_slot():
+    scheduler = RateLimitScheduler(max_concurrent=1, background_slots=1)
+    order = []
+
+    def take(priority):
+        with scheduler.slot(priority):
+            order.append(priority)
+
+    with scheduler.slot(INTERACTIVE):
+        waiting = threading.Thread(target=take, args=(BACKGROUND,))
+        waiting.start()
+        time.sleep(0.05)
+        page = threading.Thread(target=take, args=(INTERACTIVE,))
+        page.start()
+        time.sleep(0.05)
+    waiting.join()
+    page.join()
+
+    assert order == [INTERACTIVE, BACKGROUND]
+
+
+def test_disk_cache_entry_is_promoted_to_memory(client, fake_github, tmp_path, monkeypatch):
+    _, github = fake_github
+    monkeypatch.setattr(client, "disk_cache", DiskCache(str(tmp_path / "github_cache.db")))
+    client.get_page("/users/alice")
+    assert github.requests == 1
+
+    # Cold start: memória vazia, o disco responde e a entrada volta para a memória
+    client.cache.clear()
+    status, data, _ = client.get_page("/users/alice")
+    assert (status, data.login) == (200, "alice")
+    assert github.requests == 1
+    assert client.cache.get(client.url_for("/users/alice")) is not None
+
+
+def test_expired_disk_entry_is_revalidated_with_304(client, fake_github, tmp_path, monkeypatch):
+    _, github = fake_github
+    disk_cache = DiskCache(str(tmp_path / "github_cache.db"))
+    monkeypatch.setattr(client, "disk_cache", disk_cache)
+    client.get_page("/users/alice")
+    url = client.url_for("/users/alice")
+    disk_cache.touch(url, -1)
+    client.cache.clear()
+
+    status, data, _ = client.get_page("/users/alice")
+    assert (status, data.login) == (200, "alice")
+    assert (github.requests, github.not_modified) == (2, 1)
+    assert disk_cache.get(url).ttl_left() > 0
+
+
+def test_corrupt_disk_entry_is_a_miss(client, fake_github, tmp_path, monkeypatch):
+    _, github = fake_github
+    disk_cache = DiskCache(str(tmp_path / "github_cache.db"))
+    monkeypatch.setattr(client, "disk_cache", disk_cache)
+    url = client.url_for("/users/alice")
+    disk_cache.set(url, b"{}", 300)
+    disk_cache._run(lambda conn: conn.execute("UPDATE responses SET body = ?", (b"not zlib",)))
+
+    status, data, _ = client.get_page("/users/alice")
+    assert (status, data.login) == (200, "alice")
+    assert github.requests == 1
+
+
+def test_not_found_is_cached(client, fake_github):
+    _, github = fake_github
+
+    assert client.get_page("/users/missing1") == (404, None, None)
+    assert client.get_page("/users/missing1") == (404, None, None)
+    assert github.requests == 1
@@ -0,0 +1,17 @@
+"""Conexões com o banco local (models.get_db_connection)."""
+
+import sqlite3
+
+import models
+
+
+def test_read_only_database_still_serves_reads(db, monkeypatch):
+    # Como no Vercel: o arquivo existe, mas não pode ser escrito (nem WAL, nem migrações)
+    connect = sqlite3.connect
+    monkeypatch.setattr(models.sqlite3, "connect", lambda path, **kwargs: connect(
+        f"file:{path}?mode=ro", uri=True, **kwargs))
+
+    assert models.get_user_by_email("ninguem@example.com") is None
+    assert models.list_github_favorites(1) == []
+    assert not models.is_github_user_favorited(1, "alice")
+    assert db not in models._migrated_databases